@@ -86,7 +86,22 @@ const orderSchema = new mongoose.Schema({
   createdAt: {
     type: Date,
     default: Date.now
+  },
+  // First 8 hex chars of _id: the order number shown to customers
+  shortId: {
+    type: String
   }
 });
 
+orderSchema.pre('save', function(next) {
+  if (!this.shortId) {
+    this.shortId = this._id.toString().slice(0, 8);
+  }
+  next();
+});
+
+// Order lookups by the short number within a customer's orders
+orderSchema.index({ user: 1, shortId: 1 });
+orderSchema.index({ user: 1, createdAt: -1 });
+
 module.exports = mongoose.model('Order', orderSchema);
@@ -59,10 +59,21 @@ const productSchema = new mongoose.Schema({
   createdAt: {
     type: Date,
     default: Date.now
+  },
+  updatedAt: {
+    type: Date,
+    default: Date.now
   }
 });
 
+// Keep updatedAt current so the chatbot can pick up catalog changes
+productSchema.pre('save', function(next) {
+  this.updatedAt = Date.now();
+  next();
+});
+
 // Index for search
 productSchema.index({ name: 'text', description: 'text' });
+productSchema.index({ updatedAt: 1 });
 
 module.exports = mongoose.model('Product', productSchema);
@@ -4,6 +4,7 @@ const User = require('../models/User');
 const Product = require('../models/Product');
 const Order = require('../models/Order');
 const { protect, admin } = require('../middleware/auth');
+const { invalidateChatbotContext } = require('../utils/chatbot');
 
 // ==================== DASHBOARD ====================
 
@@ -135,6 +136,7 @@ router.put('/users/:id', protect, admin, async (req, res) => {
     if (role && ['user', 'admin'].includes(role)) user.role = role;
 
     const updatedUser = await user.save();
+    invalidateChatbotContext(updatedUser._id.toString(), 'profile');
 
     res.json({
       _id: updatedUser._id,
@@ -400,6 +402,7 @@ router.put('/orders/:id', protect, admin, async (req, res) => {
     }
 
     const updatedOrder = await order.save();
+    invalidateChatbotContext(order.user.toString(), 'orders');
     res.json(updatedOrder);
   } catch (error) {
     console.error('Update order error:', error);
@@ -419,6 +422,7 @@ router.delete('/orders/:id', protect, admin, async (req, res) => {
     }
 
     await Order.findByIdAndDelete(req.params.id);
+    invalidateChatbotContext(order.user.toString(), 'orders');
 
     res.json({ message: 'Order deleted successfully' });
   } catch (error) {
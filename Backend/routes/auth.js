@@ -3,6 +3,7 @@ const router = express.Router();
 const jwt = require('jsonwebtoken');
 const User = require('../models/User');
 const { protect } = require('../middleware/auth');
+const { invalidateChatbotContext } = require('../utils/chatbot');
 
 // Generate JWT Token
 const generateToken = (id) => {
@@ -150,6 +151,7 @@ router.put('/profile', protect, async (req, res) => {
       }
 
       const updatedUser = await user.save();
+      invalidateChatbotContext(updatedUser._id.toString(), 'profile');
 
       res.json({
         _id: updatedUser._id,
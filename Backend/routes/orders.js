@@ -3,6 +3,7 @@ const router = express.Router();
 const Order = require('../models/Order');
 const Cart = require('../models/Cart');
 const { protect } = require('../middleware/auth');
+const { invalidateChatbotContext } = require('../utils/chatbot');
 
 // @route   POST /api/orders
 // @desc    Create new order
@@ -54,6 +55,7 @@ router.post('/', protect, async (req, res) => {
 
     // Clear user's cart after successful order
     await Cart.findOneAndDelete({ user: req.user._id });
+    invalidateChatbotContext(req.user._id.toString(), 'orders');
 
     res.status(201).json(createdOrder);
   } catch (error) {
@@ -127,6 +129,7 @@ router.put('/:id/cancel', protect, async (req, res) => {
 
     order.status = 'cancelled';
     const updatedOrder = await order.save();
+    invalidateChatbotContext(order.user.toString(), 'orders');
 
     res.json(updatedOrder);
   } catch (error) {
@@ -0,0 +1,14 @@
+// Tells the chatbot service to drop its cached copy of a user's context.
+// Fire-and-forget: the chatbot cache also expires on its own, so failures are only logged.
+const CHATBOT_API_URL = process.env.CHATBOT_API_URL;
+
+const invalidateChatbotContext = (userId, scope = 'all') => {
+  if (!CHATBOT_API_URL || !userId) return;
+
+  const url = `${CHATBOT_API_URL}/admin/users/${userId}/invalidate-context?scope=${scope}`;
+  fetch(url, { method: 'POST' }).catch((error) => {
+    console.error('Chatbot context invalidation failed:', error.message);
+  });
+};
+
+module.exports = { invalidateChatbotContext };
@@ -16,7 +16,10 @@ const ChatWidget = ({ userId, userName }) => {
     error,
     sendMessage,
     startNewThread,
+    loadEarlierMessages,
+    hasEarlierMessages,
   } = useChat(userId);
+  const lastMessageIdRef = useRef(null);
 
   // Show greeting popup after 2 seconds
   useEffect(() => {
@@ -39,8 +42,13 @@ const ChatWidget = ({ userId, userName }) => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
+  // Scroll on new messages only, not when earlier ones are prepended
   useEffect(() => {
-    scrollToBottom();
+    const lastId = messages.length ? messages[messages.length - 1].id : null;
+    if (lastId !== lastMessageIdRef.current) {
+      lastMessageIdRef.current = lastId;
+      scrollToBottom();
+    }
   }, [messages]);
 
   useEffect(() => {
@@ -270,6 +278,16 @@ const ChatWidget = ({ userId, userName }) => {
               </div>
             )}
 
+            {hasEarlierMessages && (
+              <button
+                className="chat-load-earlier"
+                onClick={loadEarlierMessages}
+                disabled={isLoading}
+              >
+                Load earlier messages
+              </button>
+            )}
+
             {messages.map((message) => (
               <div
                 key={message.id}
@@ -18,16 +18,18 @@ export const sendMessage = async (message, userId, threadId = null) => {
   return response.data;
 };
 
-export const getThreads = async (userId) => {
+// Returns { threads, next_cursor }; pass next_cursor back to get the next page
+export const getThreads = async (userId, cursor = null, limit = 20) => {
   const response = await chatApi.get('/chat/threads', {
-    params: { user_id: userId },
+    params: { user_id: userId, limit, ...(cursor && { cursor }) },
   });
   return response.data;
 };
 
-export const getThread = async (threadId, userId) => {
+// Returns the latest page of messages; pass before_cursor as `before` to get older ones
+export const getThread = async (threadId, userId, { before = null, limit = 50 } = {}) => {
   const response = await chatApi.get(`/chat/threads/${threadId}`, {
-    params: { user_id: userId },
+    params: { user_id: userId, limit, ...(before && { before }) },
   });
   return response.data;
 };
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 from functools import lru_cache
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -16,21 +17,111 @@ class Settings(BaseSettings):
 
     # Database (SQLite in /tmp for HF Spaces, can use PostgreSQL)
     database_url: str = "sqlite+aiosqlite:////tmp/chatbot.db"
+    # "tuned" applies the settings below; "default" uses driver/SQLAlchemy defaults
+    database_profile: Literal["tuned", "default"] = "tuned"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    sqlite_busy_timeout_ms: int = 5000
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle_seconds: int = 1800
+    db_pool_timeout_seconds: int = 30
+    db_statement_cache_size: int = 100  # asyncpg; set 0 behind pgbouncer in transaction mode
 
     # MongoDB (existing ShopEase DB)
     mongodb_uri: str
+    mongodb_max_pool_size: int = 50
+    mongodb_timeout_ms: int = 5000
 
     # Server
     host: str = "0.0.0.0"
     port: int = 7860  # HF Spaces default port
     debug: bool = False
 
+    # Chat: most recent messages of a thread sent to the agent
+    chat_history_window: int = 10
+
+    # Write-behind queue for chat threads and messages
+    chat_write_queue_size: int = 1000  # Requests wait when this many records are queued
+    chat_write_batch_size: int = 100  # Records per group commit
+    chat_write_flush_interval_ms: int = 50  # How long a batch waits to fill
+
+    # Agent model tiers: simple turns run on the fast model, turns that
+    # compare or recommend products (or long messages) on the large one
+    agent_model_large: str = "gpt-4o"
+    agent_model_fast: str = "gpt-4o-mini"
+    model_routing_enabled: bool = True
+    fast_model_max_words: int = 25
+
+    # Prompt token budget (context, summary, history, instructions and tool schemas)
+    prompt_token_budget: int = 6000
+    history_message_max_tokens: int = 500  # Long past answers are cut to this
+
+    # Rolling thread summaries of messages older than the history window
+    summary_model: str = "gpt-4o-mini"
+    summary_max_tokens: int = 300
+    summary_min_messages: int = 4  # Fold once this many messages fall out of the window
+
     # Qdrant Collection Names
     products_collection: str = "shopease_products"
 
+    # Vector search backend: "qdrant", or "local" to search an in-process
+    # memory-mapped mirror of the collection (Qdrant stays the source of truth)
+    vector_search_backend: Literal["qdrant", "local"] = "qdrant"
+    local_index_path: str = "/tmp/shopease_local_index"
+    local_index_dtype: str = "float32"  # float16 halves memory at a small accuracy cost
+
+    # Fuse an in-memory BM25 index with vector hits; confident keyword
+    # matches skip the embedding call entirely
+    hybrid_search_enabled: bool = True
+
     # Cohere Model
     cohere_embed_model: str = "embed-english-v3.0"
 
+    # Query embedding cache (set a path to persist it and share it across workers)
+    embedding_cache_size: int = 2048
+    embedding_cache_ttl_seconds: int = 86400
+    embedding_cache_path: Optional[str] = None
+    embedding_cache_disk_max_entries: int = 50000
+
+    # Catalog metadata (categories, counts, price ranges) refresh interval
+    catalog_cache_ttl_seconds: int = 300
+
+    # Per-user profile and recent orders cache (invalidated by the Node backend)
+    user_context_cache_size: int = 10000
+    user_context_cache_ttl_seconds: int = 300
+
+    # Deadlines for the context sources fetched before each agent run; a
+    # source that misses its deadline is left out of the prompt
+    context_user_timeout_ms: int = 500
+    context_orders_timeout_ms: int = 800
+    context_products_timeout_ms: int = 2000
+
+    # Answer simple requests (list orders, look up an order, list categories)
+    # from templates, without an agent run
+    fast_path_enabled: bool = True
+    fast_path_min_confidence: float = 0.8
+
+    # Semantic cache for answers to generic (non-personalized) first messages
+    response_cache_enabled: bool = True
+    response_cache_threshold: float = 0.95  # Cosine similarity needed for a hit
+    response_cache_size: int = 1000
+    response_cache_ttl_seconds: int = 3600
+
+    # Indexing pipeline
+    index_read_batch_size: int = 256  # Products per Mongo batch
+    index_queue_batches: int = 2  # Batches buffered between reader and writer
+    embed_batch_size: int = 96  # Cohere embed accepts up to 96 texts per call
+    upsert_batch_size: int = 256
+    index_concurrency: int = 4
+    index_max_retries: int = 3
+    index_retry_backoff_seconds: float = 1.0
+
+    # Catalog watcher (change streams, or updatedAt polling as a fallback)
+    catalog_watch_enabled: bool = False
+    catalog_poll_interval_seconds: int = 30
+    catalog_deletion_sweep_every: int = 10  # polls between deleted-product sweeps
+
     # Strip whitespace from all API keys
     @field_validator('openai_api_key', 'cohere_api_key', 'qdrant_api_key', 'qdrant_url', 'mongodb_uri', mode='before')
     @classmethod
@@ -1,9 +1,19 @@
+import logging
+from typing import Any, Dict
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from pymongo import MongoClient
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateColumn
+from pymongo import AsyncMongoClient
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# QueuePool's max_overflow when create_async_engine isn't given one
+DEFAULT_MAX_OVERFLOW = 10
 
 
 # Database URL handling
@@ -21,11 +31,69 @@ def get_async_database_url(url: str) -> str:
     return url
 
 
+def get_engine_options(url: str) -> Dict[str, Any]:
+    """create_async_engine arguments for the configured storage profile."""
+    if settings.database_profile != "tuned":
+        return {}
+    if make_url(url).get_backend_name() == "sqlite":
+        # Pragmas are applied per connection by _apply_sqlite_pragmas
+        return {"connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000}}
+
+    options: Dict[str, Any] = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_pre_ping": True,
+    }
+    if "+asyncpg" in url:
+        options["connect_args"] = {"statement_cache_size": settings.db_statement_cache_size}
+    return options
+
+
+_database_url = get_async_database_url(settings.database_url)
+_engine_options = get_engine_options(_database_url)
 engine = create_async_engine(
-    get_async_database_url(settings.database_url),
+    _database_url,
     echo=settings.debug,
+    **_engine_options,
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the single writer; synchronous=NORMAL is
+    durable across application crashes in WAL mode and avoids an fsync per
+    commit; mmap serves reads from the page cache.
+    """
+    if settings.database_profile != "tuned" or engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool utilization for the admin metrics endpoint."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__, "utilization": None}
+    if isinstance(pool, QueuePool):
+        # Only the tuned server profile passes max_overflow; otherwise QueuePool's default applies
+        max_overflow = _engine_options.get("max_overflow", DEFAULT_MAX_OVERFLOW)
+        capacity = pool.size() + max_overflow if max_overflow >= 0 else None  # -1: unbounded
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            utilization=round(pool.checkedout() / capacity, 3) if capacity else None,
+        )
+    return stats
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -48,22 +116,57 @@ async def get_db() -> AsyncSession:
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips existing tables, so add columns and indexes introduced since
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
+
+
+def _add_missing_columns(sync_conn):
+    """Add new nullable or server-defaulted columns to existing tables."""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                # Existing rows would have no value; this needs a real migration
+                logger.warning(
+                    "Not adding column %s.%s: it is NOT NULL without a server default",
+                    table.name, column.name,
+                )
+                continue
+            column_spec = CreateColumn(column).compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_spec}"))
+
+
+def _create_missing_indexes(sync_conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
 
 
 # MongoDB Setup (for accessing existing ShopEase data)
 class MongoDB:
-    client: MongoClient = None
+    """Async MongoDB access; the client is opened and closed in main.lifespan."""
+    client: AsyncMongoClient = None
     db = None
 
     @classmethod
-    def connect(cls):
-        cls.client = MongoClient(settings.mongodb_uri)
+    async def connect(cls):
+        cls.client = AsyncMongoClient(
+            settings.mongodb_uri,
+            maxPoolSize=settings.mongodb_max_pool_size,
+            serverSelectionTimeoutMS=settings.mongodb_timeout_ms,
+        )
         cls.db = cls.client.shopease
 
     @classmethod
-    def close(cls):
+    async def close(cls):
         if cls.client:
-            cls.client.close()
+            await cls.client.close()
+            cls.client = None
+            cls.db = None
 
     @classmethod
     def get_users_collection(cls):
@@ -1,10 +1,19 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import get_settings
 from app.database import init_db, MongoDB
+from app.services.embedding_cache import embedding_cache
+from app.services.catalog_watcher import catalog_watcher
+from app.services.context import context_service
+from app.services.chat_writer import chat_writer
+from app.services.jobs import job_manager
+from app.services.summarizer import thread_summarizer
+from app.services.vector_store import vector_store
 from app.routers.chat import router as chat_router
 from app.routers.admin import router as admin_router
+from app.routers.catalog import router as catalog_router
 
 settings = get_settings()
 
@@ -16,16 +25,43 @@ async def lifespan(app: FastAPI):
 
     # Initialize PostgreSQL
     await init_db()
+    await job_manager.recover()
+    chat_writer.start()
     print("[OK] PostgreSQL initialized")
 
     # Connect to MongoDB
-    MongoDB.connect()
+    await MongoDB.connect()
     print("[OK] MongoDB connected")
 
+    # Categories, counts and price ranges are refreshed on a schedule
+    app.state.catalog_refresh_task = asyncio.create_task(context_service.refresh_catalog_periodically())
+
+    if vector_store.mirrors:
+        # Load in the background; searches use Qdrant alone until they are ready
+        app.state.search_index_task = asyncio.create_task(
+            asyncio.to_thread(vector_store.load_search_indexes)
+        )
+        print("[OK] Search indexes loading")
+
+    if settings.catalog_watch_enabled:
+        catalog_watcher.start()
+        print("[OK] Catalog watcher started")
+
     yield
 
     # Shutdown
-    MongoDB.close()
+    tasks = [app.state.catalog_refresh_task, getattr(app.state, "search_index_task", None)]
+    tasks = [task for task in tasks if task is not None]
+    for task in tasks:
+        task.cancel()
+    # Let them finish unwinding before closing the clients they use
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await catalog_watcher.stop()
+    await job_manager.shutdown()
+    await thread_summarizer.shutdown()
+    await chat_writer.stop()  # Flush queued chat messages
+    await MongoDB.close()
+    embedding_cache.close()
     print("[SHUTDOWN] ShopEase Chatbot shutdown complete")
 
 
@@ -48,6 +84,7 @@ app.add_middleware(
 # Include routers
 app.include_router(chat_router, prefix="/api")
 app.include_router(admin_router, prefix="/api")
+app.include_router(catalog_router, prefix="/api")
 
 
 @app.get("/")
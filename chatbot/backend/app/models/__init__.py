@@ -1,3 +1,4 @@
 from app.models.chat import ChatThread, ChatMessage, UserMemory
+from app.models.indexing import IndexCheckpoint, IndexJob
 
-__all__ = ["ChatThread", "ChatMessage", "UserMemory"]
+__all__ = ["ChatThread", "ChatMessage", "UserMemory", "IndexCheckpoint", "IndexJob"]
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from datetime import datetime, timezone
 import uuid
 
 
@@ -9,15 +10,25 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
 class ChatThread(Base):
     __tablename__ = "chat_threads"
+    __table_args__ = (
+        # Thread listing: WHERE user_id = ? ORDER BY created_at DESC, keyset paginated
+        Index("ix_chat_threads_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid)
     user_id = Column(String(50), nullable=False, index=True)  # MongoDB user ID
     user_name = Column(String(100), nullable=True)
     user_email = Column(String(100), nullable=True)
     title = Column(String(200), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    summary = Column(Text, nullable=True)  # Rolling summary of messages older than the history window
+    summarized_until = Column(DateTime(timezone=True), nullable=True)  # created_at of the last summarized message
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     messages = relationship("ChatMessage", back_populates="thread", cascade="all, delete-orphan")
@@ -25,13 +36,18 @@ class ChatThread(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # History windows: WHERE thread_id = ? ORDER BY created_at DESC LIMIT n
+        Index("ix_chat_messages_thread_id_created_at", "thread_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid)
     thread_id = Column(String(36), ForeignKey("chat_threads.id"), nullable=False)
     role = Column(String(20), nullable=False)  # user, assistant, system
     content = Column(Text, nullable=False)
     extra_data = Column(JSON, nullable=True)  # For tool calls, context, etc.
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python so messages saved in one transaction keep their order
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
 
     thread = relationship("ChatThread", back_populates="messages")
 
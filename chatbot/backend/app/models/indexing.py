@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, DateTime, Integer, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.chat import generate_uuid
+
+
+class IndexCheckpoint(Base):
+    """Resume point for an interrupted catalog indexing run."""
+    __tablename__ = "index_checkpoints"
+
+    collection = Column(String(100), primary_key=True)  # Qdrant collection name
+    mode = Column(String(20), nullable=False)  # full, delta
+    last_id = Column(String(24), nullable=False)  # Last MongoDB product _id indexed
+    processed = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class IndexJob(Base):
+    """History of background index, reindex and delete jobs."""
+    __tablename__ = "index_jobs"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    kind = Column(String(20), nullable=False)  # index, reindex, delete
+    collection = Column(String(100), nullable=False, index=True)
+    mode = Column(String(20), nullable=True)  # full, delta (index jobs only)
+    product_id = Column(String(24), nullable=True)  # reindex/delete jobs only
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed, cancelled, interrupted
+    processed = Column(Integer, default=0)
+    total = Column(Integer, nullable=True)
+    errors = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
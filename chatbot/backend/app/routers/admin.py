@@ -1,77 +1,96 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from app.database import pool_stats
 from app.services.vector_store import vector_store
-from app.services.context import context_service
-from typing import Dict, Any
+from app.services.embedding_cache import embedding_cache
+from app.services.response_cache import response_cache
+from app.services.user_context_cache import user_context_cache
+from app.services.catalog_watcher import catalog_watcher
+from app.services.chat_writer import chat_writer
+from app.services.intent_router import intent_router
+from app.services.model_router import model_router
+from app.services.jobs import job_manager, JobConflictError
+from app.services.metrics import metrics
+from typing import Dict, Any, List, Literal
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-@router.post("/index-products")
-async def index_products() -> Dict[str, Any]:
+@router.post("/index-products", status_code=202)
+async def index_products(
+    mode: Literal["full", "delta"] = Query("full"),
+    resume: bool = Query(True),
+) -> Dict[str, Any]:
     """
-    Index all products from MongoDB into Qdrant for vector search.
+    Start a background job indexing all products from MongoDB into Qdrant.
     This should be called initially and whenever products are updated.
+
+    The catalog is streamed in batches, so there is no size limit.
+    `mode=delta` only re-embeds products whose text changed, patches
+    price/stock-only changes in place and removes deleted products.
+    An interrupted run resumes from its checkpoint unless `resume=false`.
+    Poll `/admin/jobs/{job_id}` for progress.
     """
-    try:
-        # Get all products from MongoDB
-        products = context_service.get_all_products(limit=1000)
+    return await _submit_job("index", mode=mode, resume=resume)
 
-        if not products:
-            return {"message": "No products found to index", "count": 0}
 
-        # Index into Qdrant
-        vector_store.upsert_products(products)
+@router.post("/reindex-product/{product_id}", status_code=202)
+async def reindex_product(product_id: str) -> Dict[str, Any]:
+    """Start a background job reindexing a single product after it's updated."""
+    return await _submit_job("reindex", product_id=product_id)
 
-        return {
-            "message": "Products indexed successfully",
-            "count": len(products)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
 
+@router.delete("/remove-product/{product_id}", status_code=202)
+async def remove_product_from_index(product_id: str) -> Dict[str, Any]:
+    """Start a background job removing a product from the vector index."""
+    return await _submit_job("delete", product_id=product_id)
 
-@router.post("/reindex-product/{product_id}")
-async def reindex_product(product_id: str) -> Dict[str, Any]:
-    """Reindex a single product after it's updated."""
-    try:
-        product = context_service.get_product_by_id(product_id)
 
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
+@router.get("/jobs")
+async def list_jobs(limit: int = Query(20, ge=1, le=100)) -> List[Dict[str, Any]]:
+    """Get the most recent indexing jobs."""
+    return await job_manager.list_jobs(limit=limit)
 
-        # Convert to format expected by vector store
-        product["_id"] = product_id
-        vector_store.upsert_products([product])
 
-        return {"message": f"Product {product_id} reindexed successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Reindexing failed: {str(e)}")
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Get a job's status and progress (processed/total, rate, ETA, errors)."""
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
-@router.delete("/remove-product/{product_id}")
-async def remove_product_from_index(product_id: str) -> Dict[str, Any]:
-    """Remove a product from the vector index."""
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a running job. Index jobs keep their checkpoint and can be resumed."""
+    if not await job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return await job_manager.get(job_id)
+
+
+async def _submit_job(kind: str, **kwargs) -> Dict[str, Any]:
     try:
-        vector_store.delete_product(product_id)
-        return {"message": f"Product {product_id} removed from index"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Removal failed: {str(e)}")
+        return await job_manager.submit(kind, **kwargs)
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @router.get("/index-stats")
 async def get_index_stats() -> Dict[str, Any]:
     """Get statistics about the vector index."""
     try:
-        collection_info = vector_store.client.get_collection(
-            vector_store.products_collection
+        collection_info = await asyncio.to_thread(
+            vector_store.client.get_collection,
+            vector_store.products_collection,
         )
         return {
             "collection": vector_store.products_collection,
             "points_count": collection_info.points_count,
             "vectors_count": collection_info.vectors_count,
             "status": collection_info.status,
+            "local_index": vector_store.local_index.stats() if vector_store.local_index else None,
+            "lexical_index": vector_store.lexical_index.stats() if vector_store.lexical_index else None,
         }
     except Exception as e:
         return {
@@ -79,3 +98,58 @@ async def get_index_stats() -> Dict[str, Any]:
             "error": str(e),
             "status": "not_found"
         }
+
+
+@router.post("/local-index/sync")
+async def sync_local_index() -> Dict[str, Any]:
+    """Rebuild the in-process vector index from Qdrant."""
+    if not vector_store.local_index:
+        raise HTTPException(status_code=400, detail="Local vector index is not enabled")
+    try:
+        points = await asyncio.to_thread(vector_store.sync_local_index)
+        return {"message": "Local index synced from Qdrant", "points": points}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Local index sync failed: {str(e)}")
+
+
+@router.get("/catalog-watcher")
+async def get_catalog_watcher_status() -> Dict[str, Any]:
+    """Get the status of the MongoDB catalog watcher."""
+    return catalog_watcher.status()
+
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """Get in-process counters, latency summaries, database pool, write queue, fast-path and model tier state."""
+    return {
+        **metrics.snapshot(),
+        "db_pool": pool_stats(),
+        "chat_writer": chat_writer.stats(),
+        "fast_path": intent_router.stats(),
+        "model_tiers": model_router.stats(),
+    }
+
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the in-process caches."""
+    return {
+        "embeddings": embedding_cache.stats(),
+        "responses": {**response_cache.stats(), "catalog_generation": vector_store.generation},
+        "user_context": user_context_cache.stats(),
+    }
+
+
+@router.post("/users/{user_id}/invalidate-context")
+async def invalidate_user_context(
+    user_id: str,
+    scope: Literal["all", "orders", "profile"] = Query("all"),
+) -> Dict[str, Any]:
+    """
+    Drop a user's cached profile and/or recent orders.
+
+    Called by the Node backend when an order is placed or changes status, or
+    when a profile is updated.
+    """
+    user_context_cache.invalidate(user_id, scope)
+    return {"message": f"Invalidated {scope} context for user {user_id}"}
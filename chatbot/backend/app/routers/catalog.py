@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.services.context import context_service
+from typing import Dict, Any
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+
+@router.get("/facets")
+async def get_catalog_facets() -> Dict[str, Any]:
+    """Get categories with product counts and price ranges for filtering."""
+    return await context_service.get_catalog_metadata()
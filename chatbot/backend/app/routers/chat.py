@@ -1,16 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import func, select
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
 from app.database import get_db
-from app.models.chat import ChatThread, ChatMessage
-from app.schemas.chat import ChatRequest, ChatResponse, ChatThreadResponse, ChatMessageResponse
+from app.models.chat import ChatThread, ChatMessage, utcnow
+from app.schemas.chat import (
+    ChatRequest,
+    ChatResponse,
+    ChatThreadResponse,
+    ChatMessageResponse,
+    ChatThreadPage,
+    ChatThreadSummary,
+)
 from app.services.agent import shopease_agent
-from app.services.context import context_service
+from app.services.chat_writer import chat_writer
+from app.services.metrics import metrics
+from app.services.summarizer import thread_summarizer
+from app.services.turn_context import TurnContext
+from app.utils.pagination import cursor_condition, encode_cursor
+import json
+import time
 import uuid
 
+settings = get_settings()
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Characters of the latest message shown in thread listings
+PREVIEW_LENGTH = 120
+
 
 @router.post("/", response_model=ChatResponse)
 async def send_message(
@@ -18,107 +37,241 @@ async def send_message(
     db: AsyncSession = Depends(get_db)
 ):
     """Send a message to the chatbot and get a response."""
+    started = time.perf_counter()
+    received_at = utcnow()
+    turn = TurnContext(request.user_id, request.message)
+    thread_id, thread_history, thread_summary = await _prepare_thread(request, turn, db)
+
+    # Get agent response
+    try:
+        response_text = await shopease_agent.chat(
+            user_id=request.user_id,
+            message=request.message,
+            thread_history=thread_history,
+            turn=turn,
+            thread_summary=thread_summary,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
+    # Messages are saved by the write-behind queue after the response
+    await _save_turn(request, thread_id, received_at, response_text)
+    metrics.observe("chat.total", time.perf_counter() - started)
+
+    return ChatResponse(
+        message=response_text,
+        thread_id=thread_id,
+        context_used=turn.context_used,
+        metadata={"dropped_context": turn.dropped_context},
+    )
+
+
+@router.post("/stream")
+async def stream_message(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Send a message and stream the response as Server-Sent Events.
+
+    Events: `thread` (thread id), `delta` (text chunk), `tool_call` and
+    `tool_result` (tool progress), then `done` with the full message, or
+    `error`. Messages are saved once the stream completes.
+    """
+    received_at = utcnow()
+    turn = TurnContext(request.user_id, request.message)
+    thread_id, thread_history, thread_summary = await _prepare_thread(request, turn, db)
+
+    async def event_stream():
+        yield _sse("thread", {"thread_id": thread_id})
+        try:
+            async for event in shopease_agent.chat_stream(
+                user_id=request.user_id,
+                message=request.message,
+                thread_history=thread_history,
+                turn=turn,
+                thread_summary=thread_summary,
+            ):
+                if event["event"] == "done":
+                    await _save_turn(request, thread_id, received_at, event["data"]["message"])
+                    event["data"]["thread_id"] = thread_id
+                    event["data"]["dropped_context"] = turn.dropped_context
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            yield _sse("error", {"detail": f"Agent error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _save_turn(request: ChatRequest, thread_id: str, received_at, response_text: str):
+    """Queue the user message and the reply for saving, then fold old turns into the summary."""
+    await chat_writer.enqueue(
+        ChatMessage(
+            id=str(uuid.uuid4()),
+            thread_id=thread_id,
+            role="user",
+            content=request.message,
+            created_at=received_at,
+        ),
+        ChatMessage(
+            id=str(uuid.uuid4()),
+            thread_id=thread_id,
+            role="assistant",
+            content=response_text,
+            created_at=utcnow(),
+        ),
+        thread_id=thread_id,
+        user_id=request.user_id,
+    )
+    thread_summarizer.schedule(thread_id)
+
+
+async def _prepare_thread(
+    request: ChatRequest,
+    turn: TurnContext,
+    db: AsyncSession,
+) -> Tuple[str, List[Dict[str, str]], Optional[str]]:
+    """Create or verify the request's thread and load its summary and most recent history."""
     thread_id = request.thread_id
 
     # Create new thread if needed
     if not thread_id:
         # Get user info for the thread
-        user_context = context_service.get_user_context(request.user_id)
+        user_context = await turn.get_user_context()
 
         new_thread = ChatThread(
             id=str(uuid.uuid4()),
             user_id=request.user_id,
             user_name=user_context.get("name") if user_context.get("found") else None,
             user_email=user_context.get("email") if user_context.get("found") else None,
+            created_at=utcnow(),
         )
-        db.add(new_thread)
-        await db.commit()
-        thread_id = new_thread.id
-    else:
-        # Verify thread exists and belongs to user
-        result = await db.execute(
-            select(ChatThread).where(
-                ChatThread.id == thread_id,
-                ChatThread.user_id == request.user_id
-            )
+        await chat_writer.enqueue(new_thread, thread_id=new_thread.id, user_id=request.user_id)
+        return new_thread.id, [], None
+
+    # Verify thread exists and belongs to user, once its queued writes are saved
+    await chat_writer.wait_for_thread(thread_id)
+    result = await db.execute(
+        select(ChatThread).where(
+            ChatThread.id == thread_id,
+            ChatThread.user_id == request.user_id
         )
-        thread = result.scalar_one_or_none()
-        if not thread:
-            raise HTTPException(status_code=404, detail="Thread not found")
+    )
+    thread = result.scalar_one_or_none()
+    if not thread:
+        raise HTTPException(status_code=404, detail="Thread not found")
 
-    # Get thread history
+    # Get the latest messages (newest first, served by the thread/created_at index)
     result = await db.execute(
-        select(ChatMessage)
+        select(ChatMessage.role, ChatMessage.content)
         .where(ChatMessage.thread_id == thread_id)
-        .order_by(ChatMessage.created_at)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(settings.chat_history_window)
     )
-    messages = result.scalars().all()
+    rows = result.all()
 
     thread_history = [
-        {"role": msg.role, "content": msg.content}
-        for msg in messages
+        {"role": role, "content": content}
+        for role, content in reversed(rows)
     ]
+    return thread_id, thread_history, thread.summary
 
-    # Save user message
-    user_message = ChatMessage(
-        id=str(uuid.uuid4()),
-        thread_id=thread_id,
-        role="user",
-        content=request.message,
-    )
-    db.add(user_message)
 
-    # Get agent response
-    try:
-        response_text = await shopease_agent.chat(
-            user_id=request.user_id,
-            message=request.message,
-            thread_history=thread_history,
-        )
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+@router.get("/threads", response_model=ChatThreadPage)
+async def get_threads(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a user's chat threads, newest first.
 
-    # Save assistant message
-    assistant_message = ChatMessage(
-        id=str(uuid.uuid4()),
-        thread_id=thread_id,
-        role="assistant",
-        content=response_text,
-    )
-    db.add(assistant_message)
-    await db.commit()
+    Each thread carries its message count and a preview of its latest
+    message, computed in the same query. Pass `next_cursor` from a page as
+    `cursor` to get the next one.
+    """
+    await chat_writer.wait_for_user(user_id)
 
-    return ChatResponse(
-        message=response_text,
-        thread_id=thread_id,
+    message_count = (
+        select(func.count())
+        .where(ChatMessage.thread_id == ChatThread.id)
+        .scalar_subquery()
+    )
+    last_message_preview = (
+        select(func.substr(ChatMessage.content, 1, PREVIEW_LENGTH))
+        .where(ChatMessage.thread_id == ChatThread.id)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
     )
 
+    query = select(
+        ChatThread.id,
+        ChatThread.user_id,
+        ChatThread.user_name,
+        ChatThread.user_email,
+        ChatThread.title,
+        ChatThread.created_at,
+        ChatThread.updated_at,
+        message_count.label("message_count"),
+        last_message_preview.label("last_message_preview"),
+    ).where(ChatThread.user_id == user_id)
+
+    if cursor:
+        try:
+            query = query.where(cursor_condition(ChatThread, cursor, before=True))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.get("/threads", response_model=List[ChatThreadResponse])
-async def get_threads(
-    user_id: str,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get all chat threads for a user."""
     result = await db.execute(
-        select(ChatThread)
-        .where(ChatThread.user_id == user_id)
-        .order_by(ChatThread.created_at.desc())
+        query
+        .order_by(ChatThread.created_at.desc(), ChatThread.id.desc())
+        .limit(limit + 1)
     )
-    threads = result.scalars().all()
+    rows = result.mappings().all()
+
+    threads = [ChatThreadSummary(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = threads[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
 
-    return threads
+    return ChatThreadPage(threads=threads, next_cursor=next_cursor)
 
 
 @router.get("/threads/{thread_id}", response_model=ChatThreadResponse)
 async def get_thread(
     thread_id: str,
     user_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get a specific thread with all messages."""
+    """
+    Get a specific thread with a page of its messages, oldest first.
+
+    Without a cursor this is the most recent page. Pass `before_cursor` as
+    `before` to page back through older messages, or `after_cursor` as
+    `after` to fetch newer ones.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    try:
+        cursor_filter = cursor_condition(ChatMessage, before or after, before=bool(before)) if (before or after) else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    await chat_writer.wait_for_thread(thread_id)
     result = await db.execute(
         select(ChatThread)
         .where(ChatThread.id == thread_id, ChatThread.user_id == user_id)
@@ -128,13 +281,27 @@ async def get_thread(
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
 
-    # Get messages
-    messages_result = await db.execute(
-        select(ChatMessage)
-        .where(ChatMessage.thread_id == thread_id)
-        .order_by(ChatMessage.created_at)
-    )
-    messages = messages_result.scalars().all()
+    # Get one page of messages, walking the (thread_id, created_at) index from the cursor
+    query = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
+    if cursor_filter is not None:
+        query = query.where(cursor_filter)
+    if after:
+        query = query.order_by(ChatMessage.created_at, ChatMessage.id)
+    else:
+        query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+
+    messages_result = await db.execute(query.limit(limit + 1))
+    messages = list(messages_result.scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after:
+        messages.reverse()
+
+    # A full page means more in the direction of travel; the cursor row lies the other way
+    has_older = bool(after) or has_more
+    has_newer = bool(before) or (bool(after) and has_more)
+    before_cursor = encode_cursor(messages[0].created_at, messages[0].id) if messages and has_older else None
+    after_cursor = encode_cursor(messages[-1].created_at, messages[-1].id) if messages and has_newer else None
 
     return ChatThreadResponse(
         id=thread.id,
@@ -155,6 +322,8 @@ async def get_thread(
             )
             for msg in messages
         ],
+        before_cursor=before_cursor,
+        after_cursor=after_cursor,
     )
 
 
@@ -165,6 +334,7 @@ async def delete_thread(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a chat thread."""
+    await chat_writer.wait_for_thread(thread_id)
     result = await db.execute(
         select(ChatThread)
         .where(ChatThread.id == thread_id, ChatThread.user_id == user_id)
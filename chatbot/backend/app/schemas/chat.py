@@ -37,11 +37,31 @@ class ChatThreadResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     messages: List[ChatMessageResponse] = []
+    before_cursor: Optional[str] = None  # Pass as `before` to get older messages
+    after_cursor: Optional[str] = None  # Pass as `after` to get newer messages
 
     class Config:
         from_attributes = True
 
 
+class ChatThreadSummary(BaseModel):
+    """Thread metadata for listings, without its messages."""
+    id: str
+    user_id: str
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+    title: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
+
+
+class ChatThreadPage(BaseModel):
+    threads: List[ChatThreadSummary] = []
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+
 class ChatRequest(BaseModel):
     message: str
     thread_id: Optional[str] = None
@@ -1,6 +1,7 @@
 from app.services.embeddings import EmbeddingService
 from app.services.vector_store import VectorStoreService
 from app.services.context import ContextService
+from app.services.turn_context import TurnContext
 from app.services.agent import ShopEaseAgent
 
-__all__ = ["EmbeddingService", "VectorStoreService", "ContextService", "ShopEaseAgent"]
+__all__ = ["EmbeddingService", "VectorStoreService", "ContextService", "TurnContext", "ShopEaseAgent"]
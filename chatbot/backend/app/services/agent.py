@@ -1,10 +1,22 @@
+import asyncio
+import json
 import os
+import re
+import time
 from openai import OpenAI
-from agents import Agent, Runner, function_tool, set_default_openai_key
-from typing import List, Dict, Any, Optional
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, Runner, RunContextWrapper, ToolCallItem, function_tool, set_default_openai_key
+from typing import List, Dict, Any, Optional, AsyncIterator
 from app.config import get_settings
-from app.services.context import context_service
-from app.database import MongoDB
+from app.services.context import OrderRecord, context_service
+from app.services.intent_router import Intent, intent_router
+from app.services.metrics import metrics
+from app.services.model_router import model_router
+from app.services.product_filters import ProductFilters
+from app.services.response_cache import NAME_PLACEHOLDER, response_cache
+from app.services.token_budget import TokenBudget, count_tokens
+from app.services.turn_context import TurnContext
+from app.services.vector_store import vector_store
 
 settings = get_settings()
 
@@ -15,21 +27,91 @@ set_default_openai_key(settings.openai_api_key)
 # Initialize OpenAI client
 client = OpenAI(api_key=settings.openai_api_key)
 
+# Tools whose output is specific to the signed-in user; answers using them are never cached
+PERSONAL_TOOLS = {"get_order_status"}
+
+# Orders listed per page by get_order_status
+ORDERS_PAGE_SIZE = 5
+
+
+async def _within_deadline(fetch, timeout_ms: int):
+    """Await a shared turn lookup for at most `timeout_ms`, without cancelling it."""
+    return await asyncio.wait_for(asyncio.shield(fetch), timeout_ms / 1000)
+
+
+def format_order_details(order: OrderRecord) -> str:
+    items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
+    return f"""
+Order #{order['order_id'][:8]}
+- Status: {order['status'].upper()}
+- Total: ${order['total']}
+- Items: {items_str}
+- Paid: {'Yes' if order['is_paid'] else 'No'}
+- Delivered: {'Yes' if order['is_delivered'] else 'No'}
+- Placed on: {order['created_at']}
+"""
+
+
+def format_order_list(orders: List[OrderRecord]) -> str:
+    result = ""
+    for order in orders:
+        items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
+        result += f"**Order #{order['order_id'][:8]}**\n"
+        result += f"- Status: {order['status'].upper()}\n"
+        result += f"- Total: ${order['total']}\n"
+        result += f"- Items: {items_str}\n\n"
+    return result
+
+
+def format_categories(categories: List[Dict[str, Any]]) -> str:
+    return "\n".join([
+        f"- {cat['name']} ({cat['product_count']} products, ${cat['min_price']} - ${cat['max_price']})"
+        for cat in categories
+    ])
+
 
 # Define tools for the agent
 @function_tool
-def search_products(query: str) -> str:
+async def search_products(
+    ctx: RunContextWrapper[TurnContext],
+    query: str,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+) -> str:
     """
     Search for products in the ShopEase store based on a query.
     Use this when the user asks about products, wants recommendations, or is looking for something to buy.
+    Pass any price, rating, category or availability constraints as filters rather than in the query.
 
     Args:
         query: The search query describing what the user is looking for
+        category: Only return products in this category
+        min_price: Minimum price in dollars
+        max_price: Maximum price in dollars
+        min_rating: Minimum star rating (0-5)
+        in_stock: True to only return products that are in stock
 
     Returns:
         A formatted string with matching products
     """
-    products = context_service.search_products(query, limit=5)
+    if category:
+        categories = await context_service.get_categories()
+        matched = next((c for c in categories if c.lower() == category.strip().lower()), None)
+        if matched is None:
+            return f"There is no '{category}' category. Available categories: {', '.join(categories)}."
+        category = matched
+
+    filters = ProductFilters(
+        category=category or None,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        in_stock=in_stock or None,
+    )
+    products = await ctx.context.search_products(query, limit=5, filters=filters)
 
     if not products:
         return "No products found matching your query."
@@ -51,68 +133,67 @@ def search_products(query: str) -> str:
 
 
 @function_tool
-def get_order_status(user_id: str, order_id: Optional[str] = None) -> str:
+async def get_order_status(
+    ctx: RunContextWrapper[TurnContext],
+    order_id: Optional[str] = None,
+    page: int = 1,
+) -> str:
     """
-    Get the status of user's orders. Can get all recent orders or a specific order.
+    Get the status of user's orders. Can list order history or look up a specific order.
 
     Args:
-        user_id: The user's ID
-        order_id: Optional specific order ID to look up
+        order_id: Optional order number (the 8-character ID shown to the user) or full order ID
+        page: Page of the order history to list, newest first (5 orders per page)
 
     Returns:
         Order status information
     """
-    orders = context_service.get_user_orders(user_id, limit=5)
+    if order_id:
+        order = await ctx.context.get_order(order_id)
+        if not order:
+            return f"I couldn't find an order with ID '{order_id}'. Please check the order ID and try again."
+        return format_order_details(order)
+
+    page = max(page, 1)
+    if page == 1:
+        orders = await ctx.context.get_user_orders(limit=ORDERS_PAGE_SIZE + 1)
+        orders, has_more = orders[:ORDERS_PAGE_SIZE], len(orders) > ORDERS_PAGE_SIZE
+    else:
+        orders, has_more = await context_service.get_user_orders_page(ctx.context.user_id, page, ORDERS_PAGE_SIZE)
 
     if not orders:
+        if page > 1:
+            return "There are no more orders in your history."
         return "You don't have any orders yet. Start shopping to place your first order!"
 
-    if order_id:
-        # Find specific order
-        for order in orders:
-            if order['order_id'].startswith(order_id) or order_id in order['order_id']:
-                items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
-                return f"""
-Order #{order['order_id'][:8]}
-- Status: {order['status'].upper()}
-- Total: ${order['total']}
-- Items: {items_str}
-- Paid: {'Yes' if order['is_paid'] else 'No'}
-- Delivered: {'Yes' if order['is_delivered'] else 'No'}
-- Placed on: {order['created_at']}
-"""
-        return f"I couldn't find an order with ID containing '{order_id}'. Please check the order ID and try again."
-
-    # Return all recent orders
-    result = "Here are your recent orders:\n\n"
-    for order in orders:
-        items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
-        result += f"**Order #{order['order_id'][:8]}**\n"
-        result += f"- Status: {order['status'].upper()}\n"
-        result += f"- Total: ${order['total']}\n"
-        result += f"- Items: {items_str}\n\n"
+    # Return this page of orders
+    result = "Here are your recent orders:\n\n" if page == 1 else f"Here are your orders (page {page}):\n\n"
+    result += format_order_list(orders)
+    if has_more:
+        result += f"There are older orders; call again with page={page + 1} to see them.\n"
 
     return result
 
 
 @function_tool
-def get_product_categories() -> str:
+async def get_product_categories() -> str:
     """
-    Get all available product categories in the store.
+    Get all available product categories in the store, with product counts and price ranges.
 
     Returns:
         List of categories
     """
-    categories = context_service.get_categories()
+    catalog = await context_service.get_catalog_metadata()
+    categories = catalog["categories"]
 
     if not categories:
         return "No categories available at the moment."
 
-    return f"We have products in the following categories:\n" + "\n".join([f"- {cat}" for cat in categories])
+    return f"We have products in the following categories:\n" + format_categories(categories)
 
 
 @function_tool
-def get_product_details(product_name: str) -> str:
+async def get_product_details(ctx: RunContextWrapper[TurnContext], product_name: str) -> str:
     """
     Get detailed information about a specific product.
 
@@ -122,7 +203,7 @@ def get_product_details(product_name: str) -> str:
     Returns:
         Detailed product information
     """
-    products = context_service.search_products(product_name, limit=1)
+    products = await ctx.context.search_products(product_name, limit=1)
 
     if not products:
         return f"I couldn't find a product called '{product_name}'. Try searching with different keywords."
@@ -153,9 +234,25 @@ class ShopEaseAgent:
         self.agent = Agent(
             name="ShopEase Assistant",
             instructions=self._get_system_prompt(),
-            model="gpt-4o",
+            model=settings.agent_model_large,
             tools=[search_products, get_order_status, get_product_categories, get_product_details],
         )
+        # One agent per model tier, sharing the instructions and tools
+        self.agents = {
+            "large": self.agent,
+            "fast": self.agent.clone(model=settings.agent_model_fast),
+        }
+
+        # Instructions and tool schemas are sent on every call; budget around them
+        reserved = count_tokens(self.agent.instructions) + sum(
+            count_tokens(tool.name + tool.description + json.dumps(tool.params_json_schema))
+            for tool in self.agent.tools
+        )
+        self.budget = TokenBudget(
+            max_tokens=settings.prompt_token_budget,
+            message_max_tokens=settings.history_message_max_tokens,
+            reserved_tokens=reserved,
+        )
 
     def _get_system_prompt(self) -> str:
         return """You are ShopEase Assistant, a friendly and helpful AI shopping assistant for the ShopEase e-commerce platform.
@@ -197,51 +294,299 @@ User: "I need a gift for my mom"
 Assistant: [Uses search_products tool and provides thoughtful recommendations]
 """
 
-    async def chat(self, user_id: str, message: str, thread_history: List[Dict[str, str]] = None) -> str:
+    async def chat(
+        self,
+        user_id: str,
+        message: str,
+        thread_history: List[Dict[str, str]] = None,
+        turn: Optional[TurnContext] = None,
+        thread_summary: Optional[str] = None,
+    ) -> str:
         """Process a chat message and return the agent's response."""
+        started = time.perf_counter()
+        turn = turn or TurnContext(user_id, message)
+        fast = await self._fast_path_answer(turn)
+        if fast is not None:
+            return fast
+
+        generation = vector_store.generation
+        cached = await self._cached_answer(turn, thread_history)
+        if cached is not None:
+            return cached
+
+        messages = await self._build_messages(turn, thread_history, thread_summary)
+
+        # Run the agent (async) on the model tier the turn needs
+        tier = model_router.choose(turn.message)
+        run_started = time.perf_counter()
+        result = await Runner.run(
+            self.agents[tier],
+            messages,
+            context=turn,
+        )
+        model_router.record(tier, time.perf_counter() - run_started, result.context_wrapper.usage)
 
-        # Get user context
-        user_context = context_service.get_user_context(user_id)
-        context_prompt = context_service.build_context_prompt(user_id, message)
+        await self._remember_answer(turn, thread_history, result, generation, time.perf_counter() - started)
+        return result.final_output
+
+    async def chat_stream(
+        self,
+        user_id: str,
+        message: str,
+        thread_history: List[Dict[str, str]] = None,
+        turn: Optional[TurnContext] = None,
+        thread_summary: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chat message, yielding events as the agent works.
+
+        Yields `delta` events with text chunks, `tool_call`/`tool_result`
+        events while tools run, and a final `done` event with the full answer.
+        """
+        started = time.perf_counter()
+        turn = turn or TurnContext(user_id, message)
+        fast = await self._fast_path_answer(turn)
+        if fast is not None:
+            yield {"event": "delta", "data": {"text": fast}}
+            yield {"event": "done", "data": {"message": fast, "time_to_first_token_ms": None, "fast_path": True}}
+            return
+
+        generation = vector_store.generation
+        cached = await self._cached_answer(turn, thread_history)
+        if cached is not None:
+            yield {"event": "delta", "data": {"text": cached}}
+            yield {"event": "done", "data": {"message": cached, "time_to_first_token_ms": None, "cached": True}}
+            return
+
+        messages = await self._build_messages(turn, thread_history, thread_summary)
+
+        tier = model_router.choose(turn.message)
+        run_started = time.perf_counter()
+        result = Runner.run_streamed(
+            self.agents[tier],
+            messages,
+            context=turn,
+        )
 
-        # Build messages with context
-        messages = []
+        first_token_at = None
+        tool_names: Dict[str, str] = {}
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - started
+                    metrics.observe("chat.stream.time_to_first_token", first_token_at)
+                yield {"event": "delta", "data": {"text": event.data.delta}}
+
+            elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                raw = event.item.raw_item
+                name = getattr(raw, "name", None)
+                tool_names[getattr(raw, "call_id", None)] = name
+                yield {"event": "tool_call", "data": {"name": name}}
+
+            elif event.type == "run_item_stream_event" and event.name == "tool_output":
+                raw = event.item.raw_item
+                call_id = raw.get("call_id") if isinstance(raw, dict) else getattr(raw, "call_id", None)
+                yield {"event": "tool_result", "data": {"name": tool_names.get(call_id)}}
+
+        elapsed = time.perf_counter() - started
+        metrics.observe("chat.stream.total", elapsed)
+        model_router.record(tier, time.perf_counter() - run_started, result.context_wrapper.usage)
+        await self._remember_answer(turn, thread_history, result, generation, elapsed)
+        yield {
+            "event": "done",
+            "data": {
+                "message": result.final_output,
+                "time_to_first_token_ms": round(first_token_at * 1000) if first_token_at else None,
+                "model_tier": tier,
+            },
+        }
+
+    async def _fast_path_answer(self, turn: TurnContext) -> Optional[str]:
+        """A templated answer for a simple order or category request, without an agent run."""
+        if not settings.fast_path_enabled:
+            return None
+        started = time.perf_counter()
+        intent = intent_router.classify(turn.message)
+        answer = None
+        if intent is not None:
+            try:
+                answer = await self._answer_intent(turn, intent)
+            except Exception:
+                answer = None  # Let the agent handle it
+        intent_router.record(intent if answer is not None else None)
+        if answer is not None:
+            metrics.observe("chat.fast_path.total", time.perf_counter() - started)
+        return answer
+
+    async def _answer_intent(self, turn: TurnContext, intent: Intent) -> Optional[str]:
+        if intent.name == "order_lookup":
+            order = await turn.get_order(intent.order_ref)
+            if not order:
+                return None  # Maybe not an order number after all
+            return (
+                f"Here are the details of your order:\n{format_order_details(order)}\n"
+                "Is there anything else you'd like to know about this order?"
+            )
+
+        if intent.name == "order_list":
+            orders = await turn.get_user_orders(limit=ORDERS_PAGE_SIZE + 1)
+            if not orders:
+                return "You don't have any orders yet. Would you like help finding something to buy?"
+            answer = "Here are your recent orders:\n\n" + format_order_list(orders[:ORDERS_PAGE_SIZE])
+            if len(orders) > ORDERS_PAGE_SIZE:
+                answer += "You have older orders too; just ask if you'd like to see them.\n"
+            return answer + "Would you like more details on any of these orders?"
+
+        if intent.name == "categories":
+            catalog = await context_service.get_catalog_metadata()
+            if not catalog["categories"]:
+                return None
+            return (
+                "We have products in the following categories:\n"
+                f"{format_categories(catalog['categories'])}\n\n"
+                "Which category would you like to explore?"
+            )
+
+        return None
+
+    async def _cached_answer(
+        self,
+        turn: TurnContext,
+        thread_history: Optional[List[Dict[str, str]]],
+    ) -> Optional[str]:
+        """
+        A stored answer to a similar opening question, addressed to this user.
+
+        Only the first message of a thread is looked up; later turns depend on
+        the conversation so far.
+        """
+        if not settings.response_cache_enabled or thread_history:
+            return None
+        try:
+            embedding = await _within_deadline(
+                turn.get_query_embedding(turn.message), settings.context_products_timeout_ms
+            )
+        except Exception:
+            return None
+
+        answer = response_cache.get(embedding, vector_store.generation)
+        if answer is None:
+            metrics.incr("chat.response_cache.misses")
+            return None
+
+        metrics.incr("chat.response_cache.hits")
+        try:
+            user_context = await _within_deadline(turn.get_user_context(), settings.context_user_timeout_ms)
+        except Exception:
+            user_context = {}  # Greet them as "there"
+        name = user_context["name"].split()[0] if user_context.get("found") and user_context["name"] else "there"
+        return answer.replace(NAME_PLACEHOLDER, name)
+
+    async def _remember_answer(
+        self,
+        turn: TurnContext,
+        thread_history: Optional[List[Dict[str, str]]],
+        result,
+        generation: int,
+        elapsed_seconds: float,
+    ):
+        """
+        Store an opening answer in the semantic cache if nothing in it is personal.
+
+        Answers that used an order tool, or mention the user's email, orders or
+        ordered items, are skipped. The user's name is replaced by a
+        placeholder so the answer can be re-addressed (by first name) on a hit.
+        """
+        if not settings.response_cache_enabled or thread_history or not result.final_output:
+            return
+        tools_used = {
+            getattr(item.raw_item, "name", None)
+            for item in result.new_items
+            if isinstance(item, ToolCallItem)
+        }
+        if tools_used & PERSONAL_TOOLS:
+            return
+        # Without the user and their orders the answer can't be checked for personal details
+        if "user" in turn.dropped_context or "orders" in turn.dropped_context:
+            return
+
+        answer = result.final_output
+        try:
+            user_context = await turn.get_user_context()
+            orders = await turn.get_user_orders(limit=3)
+        except Exception:
+            return
+        personal = [order["order_id"][:8] for order in orders]
+        personal += [item["name"] for order in orders for item in order["items"] if item.get("name")]
+        if user_context.get("found"):
+            personal.append(user_context["email"])
+        if any(value and value.lower() in answer.lower() for value in personal):
+            return
+
+        if user_context.get("found") and user_context["name"]:
+            names = [user_context["name"]] + user_context["name"].split()[:1]
+            pattern = r"\b(" + "|".join(re.escape(n) for n in names) + r")\b"
+            answer = re.sub(pattern, NAME_PLACEHOLDER, answer)
+
+        try:
+            embedding = await turn.get_query_embedding(turn.message)
+        except Exception:
+            return
+        response_cache.set(embedding, answer, generation, elapsed_seconds)
+
+    async def _build_messages(
+        self,
+        turn: TurnContext,
+        thread_history: Optional[List[Dict[str, str]]],
+        thread_summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Build the agent input: context, user name, thread summary, recent
+        history and the new message, trimmed to the prompt token budget.
+        """
+
+        context_prompt = await context_service.build_context_prompt(turn)
+
+        # Get user context (already fetched for the context prompt, unless it was too slow)
+        user_context = {} if "user" in turn.dropped_context else await turn.get_user_context()
 
         # Add context as a system message
+        context = None
         if context_prompt:
-            messages.append({
+            context = {
                 "role": "system",
                 "content": f"Current user context:\n{context_prompt}"
-            })
+            }
+
+        system = []
 
         # Add user name context
         if user_context.get("found"):
-            messages.append({
+            system.append({
                 "role": "system",
                 "content": f"The user's name is {user_context['name']}. Address them by name."
             })
 
+        # Add the summary of turns older than the history window
+        if thread_summary:
+            system.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{thread_summary}"
+            })
+
         # Add thread history
-        if thread_history:
-            for msg in thread_history[-10:]:  # Last 10 messages for context
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+        history = [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in (thread_history or [])[-settings.chat_history_window:]
+        ]
 
         # Add current message
-        messages.append({
+        message = {
             "role": "user",
-            "content": message
-        })
+            "content": turn.message
+        }
 
-        # Run the agent (async)
-        result = await Runner.run(
-            self.agent,
-            messages,
-        )
-
-        return result.final_output
+        return self.budget.fit(system, history, message, context=context)
 
 
 # Singleton instance
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from pymongo.errors import OperationFailure
+from app.config import get_settings
+from app.database import MongoDB
+from app.services.context import context_service
+from app.services.vector_store import vector_store
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class CatalogWatcher:
+    """
+    Keeps the Qdrant index in step with the MongoDB products collection.
+
+    Tails a change stream when MongoDB supports it (replica sets / Atlas).
+    Otherwise it falls back to polling `updatedAt`, with a periodic sweep
+    that removes points for deleted products.
+    """
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.changes_applied = 0
+        self.last_change_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "mode": self.mode,
+            "changes_applied": self.changes_applied,
+            "last_change_at": self.last_change_at.isoformat() if self.last_change_at else None,
+        }
+
+    async def _run(self):
+        try:
+            await self._watch_change_stream()
+        except OperationFailure as e:
+            # Standalone servers don't support change streams
+            logger.info("Change streams unavailable (%s); polling updatedAt instead", e)
+        except Exception as e:
+            logger.warning("Change stream failed (%s); polling updatedAt instead", e)
+        await self._poll_updated_at()
+
+    async def _watch_change_stream(self):
+        self.mode = "change_stream"
+        resume_token = None
+        products = MongoDB.get_products_collection()
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+
+        while True:
+            try:
+                async with await products.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                ) as stream:
+                    async for change in stream:
+                        await self._apply_change(change)
+                        resume_token = stream.resume_token
+            except OperationFailure:
+                if resume_token is None:
+                    raise
+                # Resume token may have rolled off the oplog; start fresh
+                logger.warning("Change stream resume failed; restarting from now")
+                resume_token = None
+
+    async def _apply_change(self, change: Dict[str, Any]):
+        product_id = str(change["documentKey"]["_id"])
+        try:
+            if change["operationType"] == "delete" or change.get("fullDocument") is None:
+                await asyncio.to_thread(vector_store.delete_product, product_id)
+            else:
+                product = context_service.format_product(change["fullDocument"])
+                await asyncio.to_thread(vector_store.sync_products, [product])
+        except Exception as e:
+            logger.warning("Failed to apply catalog change for %s: %s", product_id, e)
+            return
+        self.changes_applied += 1
+        self.last_change_at = datetime.now(timezone.utc)
+
+    async def _poll_updated_at(self):
+        self.mode = "polling"
+        since = datetime.now(timezone.utc)
+        polls = 0
+
+        while True:
+            await asyncio.sleep(settings.catalog_poll_interval_seconds)
+            polls += 1
+            try:
+                changed = await context_service.get_products_updated_since(since)
+                if changed:
+                    await asyncio.to_thread(vector_store.sync_products, changed)
+                    stamps = [
+                        p["updated_at"].replace(tzinfo=timezone.utc)
+                        for p in changed if p["updated_at"]
+                    ]
+                    since = max(stamps, default=since)
+                    self.changes_applied += len(changed)
+                    self.last_change_at = datetime.now(timezone.utc)
+
+                # Polling can't see deletes, so sweep for them periodically
+                if polls % settings.catalog_deletion_sweep_every == 0:
+                    keep = await context_service.get_all_product_ids()
+                    removed = await asyncio.to_thread(vector_store.delete_missing, keep)
+                    self.changes_applied += removed
+            except Exception as e:
+                logger.warning("Catalog poll failed: %s", e)
+
+
+# Singleton instance
+catalog_watcher = CatalogWatcher()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.database import AsyncSessionLocal, Base
+from app.services.metrics import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ChatWriter:
+    """
+    Write-behind persistence for chat threads and messages.
+
+    Records are queued by the chat router and saved by a single background
+    task in batched transactions (group commit), so commits stay off the
+    response path. One consumer working through a FIFO queue keeps each
+    thread's records in order. The queue is bounded: when it is full,
+    `enqueue` waits, which slows callers down instead of growing memory.
+    Readers call `wait_for_thread` / `wait_for_user` first so they never
+    miss records that are still queued. A batch that keeps failing is saved
+    thread by thread, then record by record, so only bad records are lost.
+    """
+
+    COMMIT_ATTEMPTS = 3
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Counter = Counter()  # "thread:<id>" / "user:<id>" -> queued records
+        self._flushed: Optional[asyncio.Condition] = None
+        self.batches = 0
+        self.records = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            # Keep an existing queue so records still queued by a writer that
+            # stopped or died are saved by the new one
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=settings.chat_write_queue_size)
+                self._flushed = asyncio.Condition()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything queued, then stop the writer."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(_STOP)
+        await self._task
+
+    async def enqueue(self, *records: Base, thread_id: str, user_id: str):
+        """Queue ORM objects for one thread; waits while the queue is full."""
+        self.start()
+        keys = (f"thread:{thread_id}", f"user:{user_id}")
+        for key in keys:
+            self._pending[key] += len(records)
+        for record in records:
+            await self._queue.put((record, keys))
+
+    async def wait_for_thread(self, thread_id: str):
+        await self._wait(f"thread:{thread_id}")
+
+    async def wait_for_user(self, user_id: str):
+        await self._wait(f"user:{user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": settings.chat_write_queue_size,
+            "batches": self.batches,
+            "records": self.records,
+            "avg_batch": round(self.records / self.batches, 2) if self.batches else 0.0,
+            "dropped": self.dropped,
+        }
+
+    async def _wait(self, key: str):
+        if not self._pending.get(key):
+            return
+        async with self._flushed:
+            await self._flushed.wait_for(lambda: not self._pending.get(key))
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Tuple[Base, Tuple[str, ...]]] = [item]
+
+            # Gather whatever arrives within the flush interval, up to a batch
+            deadline = asyncio.get_running_loop().time() + settings.chat_write_flush_interval_ms / 1000
+            while len(batch) < settings.chat_write_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._commit(batch)
+            async with self._flushed:
+                for _, keys in batch:
+                    for key in keys:
+                        self._pending[key] -= 1
+                        if self._pending[key] <= 0:
+                            del self._pending[key]
+                self._flushed.notify_all()
+
+    async def _commit(self, batch: List[Tuple[Base, Tuple[str, ...]]]):
+        started = asyncio.get_running_loop().time()
+        records = [record for record, _ in batch]
+        for attempt in range(self.COMMIT_ATTEMPTS):
+            try:
+                await self._save(records)
+                break
+            except Exception as e:
+                if attempt == self.COMMIT_ATTEMPTS - 1:
+                    logger.warning("Chat batch of %d records failed, saving per thread: %s", len(records), e)
+                    await self._commit_separately(batch)
+                    return
+                await asyncio.sleep(0.1 * (2 ** attempt))
+
+        self.batches += 1
+        self.records += len(records)
+        metrics.observe("chat.write_behind.commit", asyncio.get_running_loop().time() - started)
+
+    async def _commit_separately(self, batch: List[Tuple[Base, Tuple[str, ...]]]):
+        """
+        Save a failed batch one thread at a time, then one record at a time
+        within a failing thread, so a bad record only loses itself (and any
+        later records that depend on it).
+        """
+        threads: Dict[str, List[Base]] = {}
+        for record, keys in batch:
+            threads.setdefault(keys[0], []).append(record)
+
+        for records in threads.values():
+            try:
+                await self._save(records)
+                self.records += len(records)
+                continue
+            except Exception:
+                pass
+            for record in records:
+                try:
+                    await self._save([record])
+                    self.records += 1
+                except Exception as e:
+                    logger.error(
+                        "Dropping chat record %s id=%s thread=%s: %s",
+                        type(record).__name__,
+                        getattr(record, "id", None),
+                        getattr(record, "thread_id", getattr(record, "id", None)),
+                        e,
+                    )
+                    self.dropped += 1
+                    metrics.incr("chat.write_behind.dropped")
+
+    @staticmethod
+    async def _save(records: List[Base]):
+        async with AsyncSessionLocal() as session:
+            session.add_all(records)
+            await session.commit()
+
+
+# Singleton instance
+chat_writer = ChatWriter()
@@ -1,64 +1,190 @@
-from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, Awaitable, List, Optional, Set, Tuple, TypedDict, TYPE_CHECKING
 from bson import ObjectId
+from app.config import get_settings
 from app.database import MongoDB
+from app.services.metrics import metrics
+from app.services.user_context_cache import user_context_cache
 from app.services.vector_store import vector_store
+from app.utils.projections import (
+    ORDER_ITEMS_SHOWN,
+    ORDER_PROJECTION,
+    PRODUCT_INDEX_PROJECTION,
+    PRODUCT_PROJECTION,
+    USER_PROJECTION,
+)
+
+if TYPE_CHECKING:
+    from app.services.turn_context import TurnContext
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Customers see the first 8 hex characters of an order's ObjectId
+SHORT_ID_LENGTH = 8
+ORDER_REF_RE = re.compile(r"[0-9a-f]{4,24}")
+
+class UserProfile(TypedDict, total=False):
+    found: bool
+    name: str
+    email: str
+    role: str
+    created_at: str
+
+
+class OrderItem(TypedDict):
+    name: str
+    quantity: int
+    price: float
+
+
+class OrderRecord(TypedDict):
+    order_id: str
+    status: str
+    total: float
+    items_count: int
+    items: List[OrderItem]
+    created_at: str
+    is_paid: bool
+    is_delivered: bool
+
+
+class ProductRecord(TypedDict):
+    id: str
+    name: str
+    description: str
+    price: float
+    category: str
+    stock: int
+    rating: float
+    features: List[str]
 
 
 class ContextService:
     """Service to retrieve context from MongoDB and Qdrant for the chatbot."""
 
+    # Catalog metadata (categories, counts, price ranges) kept in memory
+    _catalog: Optional[Dict[str, Any]] = None
+    _catalog_generation: Optional[int] = None
+    _catalog_loaded_at = 0.0
+    _catalog_lock = asyncio.Lock()
+
     @staticmethod
-    def get_user_context(user_id: str) -> Dict[str, Any]:
-        """Get user information from MongoDB."""
+    async def get_user_context(user_id: str) -> UserProfile:
+        """Get user information, from the user context cache or MongoDB."""
+        cached = user_context_cache.get_profile(user_id)
+        if cached is not None:
+            return cached
+
+        version = user_context_cache.version(user_id)
         users = MongoDB.get_users_collection()
-        user = users.find_one({"_id": ObjectId(user_id)})
+        user = await users.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
 
         if not user:
-            return {"found": False}
-
-        return {
-            "found": True,
-            "name": user.get("name", ""),
-            "email": user.get("email", ""),
-            "role": user.get("role", "user"),
-            "created_at": str(user.get("createdAt", "")),
-        }
+            profile = {"found": False}
+        else:
+            profile = {
+                "found": True,
+                "name": user.get("name", ""),
+                "email": user.get("email", ""),
+                "role": user.get("role", "user"),
+                "created_at": str(user.get("createdAt", "")),
+            }
+        user_context_cache.set_profile(user_id, profile, version)
+        return profile
 
     @staticmethod
-    def get_user_orders(user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Get recent orders for a user."""
+    async def get_user_orders(user_id: str, limit: int = 5) -> List[OrderRecord]:
+        """Get recent orders for a user, from the user context cache or MongoDB."""
+        cached = user_context_cache.get_orders(user_id, limit)
+        if cached is not None:
+            return cached
+
+        version = user_context_cache.version(user_id)
         orders = MongoDB.get_orders_collection()
         user_orders = orders.find(
-            {"user": ObjectId(user_id)}
+            {"user": ObjectId(user_id)}, ORDER_PROJECTION
         ).sort("createdAt", -1).limit(limit)
 
-        result = []
-        for order in user_orders:
-            result.append({
-                "order_id": str(order.get("_id")),
-                "status": order.get("status", ""),
-                "total": order.get("total", 0),
-                "items_count": len(order.get("items", [])),
-                "items": [
-                    {
-                        "name": item.get("name", ""),
-                        "quantity": item.get("quantity", 0),
-                        "price": item.get("price", 0),
-                    }
-                    for item in order.get("items", [])[:3]  # First 3 items
-                ],
-                "created_at": str(order.get("createdAt", "")),
-                "is_paid": order.get("isPaid", False),
-                "is_delivered": order.get("isDelivered", False),
-            })
-
+        result = [ContextService.format_order(order) async for order in user_orders]
+        user_context_cache.set_orders(user_id, limit, result, version)
         return result
 
     @staticmethod
-    def get_product_by_id(product_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user_orders_page(user_id: str, page: int = 1, page_size: int = 5) -> Tuple[List[OrderRecord], bool]:
+        """A page of a user's orders, newest first, and whether there are more."""
+        orders = MongoDB.get_orders_collection()
+        cursor = orders.find(
+            {"user": ObjectId(user_id)}, ORDER_PROJECTION
+        ).sort("createdAt", -1).skip((page - 1) * page_size).limit(page_size + 1)
+
+        result = [ContextService.format_order(order) async for order in cursor]
+        return result[:page_size], len(result) > page_size
+
+    @staticmethod
+    async def get_user_order(user_id: str, order_ref: str) -> Optional[OrderRecord]:
+        """
+        Look up one of a user's orders by full ObjectId or by the short number
+        shown to customers (the leading hex characters of the id).
+        """
+        ref = order_ref.strip().lstrip("#").lower()
+        if not ORDER_REF_RE.fullmatch(ref):
+            return None
+
+        orders = MongoDB.get_orders_collection()
+        user = ObjectId(user_id)
+        if len(ref) == 24:
+            order = await orders.find_one({"_id": ObjectId(ref), "user": user}, ORDER_PROJECTION)
+            return ContextService.format_order(order) if order else None
+
+        if len(ref) == SHORT_ID_LENGTH:
+            order = await orders.find_one({"user": user, "shortId": ref}, ORDER_PROJECTION)
+            if order:
+                return ContextService.format_order(order)
+
+        # Orders without a stored shortId: ObjectIds sort by their hex, so a
+        # prefix is an _id range
+        order = await orders.find_one(
+            {
+                "user": user,
+                "_id": {"$gte": ObjectId(ref.ljust(24, "0")), "$lte": ObjectId(ref.ljust(24, "f"))},
+            },
+            ORDER_PROJECTION,
+            sort=[("createdAt", -1)],
+        )
+        return ContextService.format_order(order) if order else None
+
+    @staticmethod
+    def format_order(order: Dict[str, Any]) -> OrderRecord:
+        """Shape an order document (projected with ORDER_PROJECTION) for the prompt and tools."""
+        items = order.get("items") or []
+        return {
+            "order_id": str(order.get("_id")),
+            "status": order.get("status", ""),
+            "total": order.get("total", 0),
+            "items_count": order.get("items_count", len(items)),
+            "items": [
+                {
+                    "name": item.get("name", ""),
+                    "quantity": item.get("quantity", 0),
+                    "price": item.get("price", 0),
+                }
+                for item in items[:ORDER_ITEMS_SHOWN]
+            ],
+            "created_at": str(order.get("createdAt", "")),
+            "is_paid": order.get("isPaid", False),
+            "is_delivered": order.get("isDelivered", False),
+        }
+
+    @staticmethod
+    async def get_product_by_id(product_id: str) -> Optional[ProductRecord]:
         """Get a specific product by ID."""
         products = MongoDB.get_products_collection()
-        product = products.find_one({"_id": ObjectId(product_id)})
+        product = await products.find_one({"_id": ObjectId(product_id)}, PRODUCT_PROJECTION)
 
         if not product:
             return None
@@ -75,47 +201,186 @@ class ContextService:
         }
 
     @staticmethod
-    def search_products(query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Search products using vector similarity."""
-        return vector_store.search_products(query, limit)
+    async def get_product_for_index(product_id: str) -> Optional[Dict[str, Any]]:
+        """Get one product shaped for indexing, like `iter_products`."""
+        products = MongoDB.get_products_collection()
+        product = await products.find_one({"_id": ObjectId(product_id)}, PRODUCT_INDEX_PROJECTION)
+        return ContextService.format_product(product) if product else None
+
+    @staticmethod
+    async def iter_products(
+        batch_size: int = 256,
+        after_id: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream every product in `_id` order, one batch at a time.
+
+        Only one batch is held in memory, and `after_id` lets an interrupted
+        run resume from its last checkpoint.
+        """
+        products = MongoDB.get_products_collection()
+        query = {"_id": {"$gt": ObjectId(after_id)}} if after_id else {}
+        cursor = products.find(query, PRODUCT_INDEX_PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+        batch: List[Dict[str, Any]] = []
+        async for product in cursor:
+            batch.append(ContextService.format_product(product))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
     @staticmethod
-    def get_all_products(limit: int = 50) -> List[Dict[str, Any]]:
-        """Get all products from MongoDB."""
+    async def count_products() -> int:
+        """Count all products in MongoDB."""
         products = MongoDB.get_products_collection()
-        all_products = products.find().limit(limit)
-
-        result = []
-        for product in all_products:
-            result.append({
-                "_id": str(product.get("_id")),
-                "name": product.get("name", ""),
-                "description": product.get("description", ""),
-                "price": product.get("price", 0),
-                "category": product.get("category", ""),
-                "stock": product.get("stock", 0),
-                "rating": product.get("rating", 0),
-                "features": product.get("features", []),
-                "image": product.get("image", ""),
-            })
+        return await products.count_documents({})
 
-        return result
+    @staticmethod
+    async def get_all_product_ids() -> Set[str]:
+        """Get the IDs of every product in MongoDB."""
+        products = MongoDB.get_products_collection()
+        return {str(doc["_id"]) async for doc in products.find({}, {"_id": 1})}
+
+    @staticmethod
+    async def get_products_updated_since(since: datetime, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get products created or updated after `since`, oldest change first."""
+        products = MongoDB.get_products_collection()
+        changed = products.find({
+            "$or": [
+                {"updatedAt": {"$gt": since}},
+                {"updatedAt": {"$exists": False}, "createdAt": {"$gt": since}},
+            ]
+        }, PRODUCT_INDEX_PROJECTION).sort([("updatedAt", 1), ("createdAt", 1)]).limit(limit)
+
+        return [ContextService.format_product(product) async for product in changed]
 
     @staticmethod
-    def get_categories() -> List[str]:
+    def format_product(product: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a product document (projected with PRODUCT_INDEX_PROJECTION) for indexing."""
+        return {
+            "_id": str(product.get("_id")),
+            "name": product.get("name", ""),
+            "description": product.get("description", ""),
+            "price": product.get("price", 0),
+            "category": product.get("category", ""),
+            "stock": product.get("stock", 0),
+            "rating": product.get("rating", 0),
+            "features": product.get("features", []),
+            "image": product.get("image", ""),
+            "updated_at": product.get("updatedAt") or product.get("createdAt"),
+        }
+
+    @classmethod
+    async def get_categories(cls) -> List[str]:
         """Get all product categories."""
+        catalog = await cls.get_catalog_metadata()
+        return [c["name"] for c in catalog["categories"]]
+
+    @classmethod
+    async def get_catalog_metadata(cls) -> Dict[str, Any]:
+        """
+        Categories with product counts and price ranges, served from memory.
+
+        Rebuilt when older than `catalog_cache_ttl_seconds` or when the product
+        index has changed since it was built (index jobs, catalog watcher).
+        """
+        if not cls._catalog_is_stale():
+            return cls._catalog
+        async with cls._catalog_lock:
+            if cls._catalog_is_stale():
+                await cls.refresh_catalog_metadata()
+        return cls._catalog
+
+    @classmethod
+    def invalidate_catalog_metadata(cls):
+        cls._catalog_loaded_at = 0.0
+
+    @classmethod
+    async def refresh_catalog_metadata(cls) -> Dict[str, Any]:
+        """Aggregate per-category counts and price ranges from MongoDB."""
+        generation = vector_store.generation
         products = MongoDB.get_products_collection()
-        categories = products.distinct("category")
-        return categories
+        cursor = await products.aggregate([
+            {"$group": {
+                "_id": "$category",
+                "product_count": {"$sum": 1},
+                "in_stock_count": {"$sum": {"$cond": [{"$gt": ["$stock", 0]}, 1, 0]}},
+                "min_price": {"$min": "$price"},
+                "max_price": {"$max": "$price"},
+            }},
+            {"$sort": {"_id": 1}},
+        ])
+
+        categories = []
+        async for group in cursor:
+            if not group["_id"]:
+                continue
+            categories.append({
+                "name": group["_id"],
+                "product_count": group["product_count"],
+                "in_stock_count": group["in_stock_count"],
+                "min_price": group["min_price"],
+                "max_price": group["max_price"],
+            })
+
+        prices = [p for c in categories for p in (c["min_price"], c["max_price"]) if p is not None]
+        cls._catalog = {
+            "categories": categories,
+            "total_products": sum(c["product_count"] for c in categories),
+            "min_price": min(prices) if prices else None,
+            "max_price": max(prices) if prices else None,
+            "refreshed_at": datetime.now(timezone.utc),
+        }
+        cls._catalog_generation = generation
+        cls._catalog_loaded_at = time.monotonic()
+        return cls._catalog
+
+    @classmethod
+    async def refresh_catalog_periodically(cls):
+        """Keep the catalog metadata warm; run as a background task."""
+        while True:
+            try:
+                await cls.refresh_catalog_metadata()
+            except Exception as e:
+                logger.warning("Catalog metadata refresh failed: %s", e)
+            await asyncio.sleep(settings.catalog_cache_ttl_seconds)
+
+    @classmethod
+    def _catalog_is_stale(cls) -> bool:
+        return (
+            cls._catalog is None
+            or cls._catalog_generation != vector_store.generation
+            or time.monotonic() - cls._catalog_loaded_at >= settings.catalog_cache_ttl_seconds
+        )
 
     @staticmethod
-    def build_context_prompt(user_id: str, query: str) -> str:
-        """Build a context-rich prompt for the agent."""
+    async def build_context_prompt(turn: "TurnContext") -> str:
+        """
+        Build a context-rich prompt for the agent from the turn's lookups.
+
+        The user profile, recent orders and relevant products are fetched
+        concurrently, each under its own deadline. A source that is too slow
+        or fails is left out of the prompt and recorded in
+        `turn.dropped_context`; the agent can still reach it through its tools.
+        """
         context_parts = []
+        user_context, orders, relevant_products = await asyncio.gather(
+            ContextService._fetch_source(
+                turn, "user", turn.get_user_context(), settings.context_user_timeout_ms
+            ),
+            ContextService._fetch_source(
+                turn, "orders", turn.get_user_orders(limit=3), settings.context_orders_timeout_ms
+            ),
+            ContextService._fetch_source(
+                turn, "products", turn.search_products(turn.message, limit=3), settings.context_products_timeout_ms
+            ),
+        )
 
         # User context
-        user_context = ContextService.get_user_context(user_id)
-        if user_context.get("found"):
+        if user_context and user_context.get("found"):
+            turn.context_used.append("user")
             context_parts.append(f"""
 USER INFORMATION:
 - Name: {user_context['name']}
@@ -124,8 +389,8 @@ USER INFORMATION:
 """)
 
         # Recent orders
-        orders = ContextService.get_user_orders(user_id, limit=3)
         if orders:
+            turn.context_used.append("orders")
             orders_text = "RECENT ORDERS:\n"
             for order in orders:
                 items_str = ", ".join([f"{i['name']} x{i['quantity']}" for i in order['items']])
@@ -133,8 +398,8 @@ USER INFORMATION:
             context_parts.append(orders_text)
 
         # Relevant products (using vector search)
-        relevant_products = ContextService.search_products(query, limit=3)
         if relevant_products:
+            turn.context_used.append("products")
             products_text = "RELEVANT PRODUCTS:\n"
             for product in relevant_products:
                 products_text += f"- {product['name']}: ${product['price']} - {product['description'][:100]}...\n"
@@ -142,6 +407,24 @@ USER INFORMATION:
 
         return "\n".join(context_parts)
 
+    @staticmethod
+    async def _fetch_source(turn: "TurnContext", name: str, fetch: Awaitable[Any], timeout_ms: int) -> Any:
+        """Await one context source within its deadline; None if it is dropped."""
+        # Shielded so a timeout doesn't cancel the turn's shared lookup, which
+        # the agent tools may still await later
+        task = asyncio.ensure_future(fetch)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            reason = f"no result after {timeout_ms}ms"
+        except Exception as e:
+            reason = str(e)
+        logger.warning("Context source '%s' dropped: %s", name, reason)
+        metrics.incr(f"chat.context.dropped.{name}")
+        turn.dropped_context.append(name)
+        return None
+
 
 # Singleton instance
 context_service = ContextService()
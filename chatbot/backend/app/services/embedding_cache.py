@@ -0,0 +1,148 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+
+def normalize_text(text: str) -> str:
+    """Collapse case and whitespace so trivially different queries share an entry."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+
+    An in-memory LRU answers hot queries; an optional SQLite file (WAL mode)
+    keeps entries across restarts and lets several workers share them.
+    Vectors are stored on disk as packed float32 blobs.
+    """
+
+    # Prune the disk tier every N writes rather than on each insert
+    PRUNE_EVERY = 100
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        ttl_seconds: Optional[int] = 86400,
+        path: Optional[str] = None,
+        disk_max_entries: int = 50000,
+    ):
+        self.memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self.disk_hits = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_created_at ON embeddings (created_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(text: str, model: str, input_type: str) -> str:
+        raw = f"{model}|{input_type}|{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, model: str, input_type: str) -> Optional[List[float]]:
+        key = self.make_key(text, model, input_type)
+        vector = self.memory.get(key)
+        if vector is not None or self._conn is None:
+            return vector
+
+        vector = self._disk_get(key)
+        if vector is not None:
+            self.disk_hits += 1
+            self.memory.set(key, vector)
+        return vector
+
+    def set(self, text: str, model: str, input_type: str, vector: List[float]):
+        key = self.make_key(text, model, input_type)
+        self.memory.set(key, vector)
+        if self._conn is not None:
+            self._disk_set(key, vector)
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, created_at = row
+        if self.ttl_seconds and created_at + self.ttl_seconds < time.time():
+            return None
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _disk_set(self, key: str, vector: List[float]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, array("f", vector).tobytes(), time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        """Drop expired rows, then the oldest rows beyond the size limit."""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        misses = memory["misses"] - self.disk_hits
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory": memory,
+            "disk": {
+                "enabled": self._conn is not None,
+                "path": self.path,
+                "hits": self.disk_hits,
+            },
+        }
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+
+# Singleton instance
+embedding_cache = EmbeddingCache(
+    max_size=settings.embedding_cache_size,
+    ttl_seconds=settings.embedding_cache_ttl_seconds,
+    path=settings.embedding_cache_path,
+    disk_max_entries=settings.embedding_cache_disk_max_entries,
+)
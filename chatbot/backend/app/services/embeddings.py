@@ -1,6 +1,7 @@
 import cohere
 from typing import List
 from app.config import get_settings
+from app.services.embedding_cache import embedding_cache
 
 settings = get_settings()
 
@@ -20,13 +21,19 @@ class EmbeddingService:
         return response.embeddings[0]
 
     def embed_query(self, query: str) -> List[float]:
-        """Generate embedding for a search query."""
+        """Generate embedding for a search query (cached)."""
+        cached = embedding_cache.get(query, self.model, "search_query")
+        if cached is not None:
+            return cached
+
         response = self.client.embed(
             texts=[query],
             model=self.model,
             input_type="search_query",
         )
-        return response.embeddings[0]
+        embedding = response.embeddings[0]
+        embedding_cache.set(query, self.model, "search_query", embedding)
+        return embedding
 
     def embed_batch(self, texts: List[str], input_type: str = "search_document") -> List[List[float]]:
         """Generate embeddings for multiple texts."""
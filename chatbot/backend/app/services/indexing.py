@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.indexing import IndexCheckpoint
+from app.services.context import context_service
+from app.services.vector_store import vector_store
+
+settings = get_settings()
+
+# Sentinel the reader puts on the queue once the cursor is exhausted
+_DONE = None
+
+
+class IndexingPipeline:
+    """
+    Streams the MongoDB catalog into Qdrant.
+
+    A reader task pulls batches from a Mongo cursor into a bounded queue;
+    the writer embeds and upserts each batch. When the writer falls behind
+    the queue fills and the reader waits, so memory stays flat regardless
+    of catalog size. After every batch the last `_id` is checkpointed, so
+    an interrupted run resumes where it stopped. The checkpoint stops
+    advancing at the first batch with failures, so a resumed run retries it.
+    """
+
+    def __init__(self, collection: Optional[str] = None):
+        self.collection = collection or vector_store.products_collection
+
+    async def run(
+        self,
+        mode: str = "full",
+        resume: bool = True,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        checkpoint = await self.load_checkpoint() if resume else None
+        if checkpoint and checkpoint.mode != mode:
+            checkpoint = None
+        after_id = checkpoint.last_id if checkpoint else None
+
+        started = time.perf_counter()
+        totals: Dict[str, Any] = {
+            "mode": mode,
+            "resumed_from": after_id,
+            "resumed_processed": checkpoint.processed if checkpoint else 0,
+            "processed": checkpoint.processed if checkpoint else 0,
+            "indexed": 0,
+            "embedded": 0,
+            "payload_updated": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "failed_ids": [],
+            "errors": [],
+        }
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.index_queue_batches)
+        reader = asyncio.create_task(self._read(queue, after_id))
+        write = vector_store.sync_products if mode == "delta" else vector_store.upsert_products
+        processed_this_run = 0
+        checkpointing = True
+
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is _DONE:
+                    break
+
+                stats = await asyncio.to_thread(write, batch)
+                self._accumulate(totals, stats, len(batch))
+                processed_this_run += len(batch)
+                if stats.get("failed"):
+                    checkpointing = False
+                if checkpointing:
+                    await self.save_checkpoint(mode, batch[-1]["_id"], totals["processed"])
+
+                if on_progress:
+                    on_progress(totals)
+
+            # Surface reader errors (e.g. a dropped Mongo connection)
+            await reader
+        finally:
+            if not reader.done():
+                reader.cancel()
+
+        if mode == "delta":
+            keep_ids = await context_service.get_all_product_ids()
+            totals["deleted"] = await asyncio.to_thread(vector_store.delete_missing, keep_ids)
+
+        if checkpointing:
+            await self.clear_checkpoint()
+
+        elapsed = time.perf_counter() - started
+        totals["elapsed_seconds"] = round(elapsed, 3)
+        totals["products_per_second"] = round(processed_this_run / elapsed, 2) if elapsed > 0 else 0.0
+        return totals
+
+    async def _read(self, queue: asyncio.Queue, after_id: Optional[str]):
+        try:
+            async for batch in context_service.iter_products(
+                batch_size=settings.index_read_batch_size,
+                after_id=after_id,
+            ):
+                await queue.put(batch)  # Blocks while the writer is behind
+        except Exception:
+            await queue.put(_DONE)  # Let the writer stop and re-raise via `await reader`
+            raise
+        await queue.put(_DONE)
+
+    @staticmethod
+    def _accumulate(totals: Dict[str, Any], stats: Dict[str, Any], batch_size: int):
+        totals["processed"] += batch_size
+        for key in ("indexed", "embedded", "payload_updated", "unchanged", "failed"):
+            totals[key] += stats.get(key, 0)
+        totals["failed_ids"].extend(stats.get("failed_ids", []))
+        totals["errors"].extend(stats.get("errors", []))
+
+    async def load_checkpoint(self) -> Optional[IndexCheckpoint]:
+        async with AsyncSessionLocal() as session:
+            return await session.get(IndexCheckpoint, self.collection)
+
+    async def save_checkpoint(self, mode: str, last_id: str, processed: int):
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(IndexCheckpoint, self.collection)
+            if checkpoint is None:
+                checkpoint = IndexCheckpoint(collection=self.collection)
+                session.add(checkpoint)
+            checkpoint.mode = mode
+            checkpoint.last_id = last_id
+            checkpoint.processed = processed
+            await session.commit()
+
+    async def clear_checkpoint(self):
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(IndexCheckpoint, self.collection)
+            if checkpoint is not None:
+                await session.delete(checkpoint)
+                await session.commit()
+
+
+# Singleton instance
+indexing_pipeline = IndexingPipeline()
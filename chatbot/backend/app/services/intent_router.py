@@ -0,0 +1,138 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from app.config import get_settings
+from app.services.metrics import metrics
+
+settings = get_settings()
+
+# Words that carry no intent of their own ("hi, can you show me ...")
+FILLER_WORDS = {
+    "hi", "hello", "hey", "please", "pls", "thanks", "thank", "can", "could", "would", "will",
+    "you", "u", "i", "me", "my", "the", "a", "an", "is", "are", "was", "it", "its", "be",
+    "what", "whats", "which", "where", "wheres", "when", "show", "list", "tell", "see", "check",
+    "get", "give", "all", "of", "do", "does", "have", "has", "your", "about", "on", "to",
+    "any", "know", "want", "need", "like", "there", "now", "yet", "so", "far",
+}
+
+ORDER_WORDS = {
+    "order", "orders", "status", "track", "tracking", "delivered", "shipped", "arrived", "arrive",
+    "coming", "package", "packages", "purchase", "purchases", "history", "recent", "latest",
+    "last", "placed", "number", "id", "been",
+}
+
+CATEGORY_WORDS = {
+    "categories", "category", "sections", "departments", "kinds", "types", "products", "sell",
+    "store", "shop", "available", "offer", "items", "things", "browse",
+}
+
+# Requests the agent has to reason about, even when they mention orders:
+# actions, complaints, negations ("hasn't arrived") and qualifiers
+# ("orders for headphones") that a template can't honour
+AGENT_ONLY_WORDS = {
+    "cancel", "return", "refund", "exchange", "change", "modify", "update", "wrong", "damaged",
+    "broken", "missing", "late", "delayed", "complaint", "complain", "why", "recommend", "buy",
+    "not", "no", "never", "didnt", "hasnt", "havent", "isnt", "wasnt", "dont", "doesnt", "wont",
+    "cant", "still",
+    "for", "with", "from", "containing", "including", "in", "under", "over", "above", "below",
+    "between", "before", "after", "since", "without",
+}
+
+# Order states; fine when looking up one order, but they filter a list ("my delivered orders")
+STATUS_WORDS = {
+    "delivered", "shipped", "arrived", "arrive", "coming", "pending", "processing", "cancelled",
+    "canceled",
+}
+
+ORDER_ANCHORS = {"order", "orders", "package", "packages", "purchase", "purchases"}
+CATEGORY_ANCHORS = {"categories", "category", "departments", "sections"}
+
+TOKEN_RE = re.compile(r"#?[a-z0-9]+")
+
+# The 8-character order number shown to customers, or a full ObjectId
+ORDER_REF_RE = re.compile(r"#?([0-9a-f]{24}|[0-9a-f]{8})")
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A request the fast path can answer without the agent."""
+    name: str  # "order_lookup", "order_list" or "categories"
+    confidence: float
+    order_ref: Optional[str] = None
+
+
+class IntentRouter:
+    """
+    Rule-based classifier for simple requests that the agent would answer
+    with a single tool call: listing orders, looking up one order, listing
+    categories.
+
+    A message matches an intent when it mentions one of the intent's anchor
+    words. Confidence is the share of its words that the intent's vocabulary
+    (plus filler) explains. Anything below `min_confidence`, mentioning more
+    than one intent, asking for an action (cancel, refund, ...), negated or
+    qualified ("orders for headphones", "my delivered orders", "a shoes
+    category") goes to the agent.
+    """
+
+    def __init__(self, min_confidence: float = 0.8):
+        self.min_confidence = min_confidence
+        self.hits: Counter = Counter()  # intent -> fast-path answers
+        self.fallbacks = 0
+
+    def classify(self, message: str) -> Optional[Intent]:
+        tokens = TOKEN_RE.findall(message.lower().replace("'", ""))
+        if not tokens or len(tokens) > 15 or AGENT_ONLY_WORDS.intersection(tokens):
+            return None
+
+        order_ref = next(
+            (m.group(1) for t in tokens if (m := ORDER_REF_RE.fullmatch(t)) and re.search(r"\d", t)),
+            None,
+        )
+        words = [t for t in tokens if not (order_ref and t.lstrip("#") == order_ref)]
+        mentions_orders = bool(ORDER_ANCHORS.intersection(words)) or order_ref is not None
+        mentions_categories = bool(CATEGORY_ANCHORS.intersection(words))
+        if mentions_orders == mentions_categories:
+            return None
+
+        if mentions_orders:
+            name = "order_lookup" if order_ref else "order_list"
+            vocabulary = ORDER_WORDS
+            if name == "order_list" and STATUS_WORDS.intersection(words):
+                return None
+        else:
+            name = "categories"
+            vocabulary = CATEGORY_WORDS
+
+        explained = sum(1 for t in words if t in vocabulary or t in FILLER_WORDS) + (1 if order_ref else 0)
+        confidence = explained / len(tokens)
+        if confidence < self.min_confidence:
+            return None
+        if name == "categories" and explained < len(tokens):
+            return None  # Probably names a category ("a shoes category")
+        return Intent(name=name, confidence=round(confidence, 2), order_ref=order_ref)
+
+    def record(self, intent: Optional[Intent]):
+        """Count a message as answered by the fast path (intent) or sent to the agent (None)."""
+        if intent is None:
+            self.fallbacks += 1
+            metrics.incr("chat.fast_path.fallbacks")
+        else:
+            self.hits[intent.name] += 1
+            metrics.incr(f"chat.fast_path.{intent.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        total = hits + self.fallbacks
+        return {
+            "enabled": settings.fast_path_enabled,
+            "hits": hits,
+            "fallbacks": self.fallbacks,
+            "rate": round(hits / total, 3) if total else 0.0,
+            "by_intent": dict(self.hits),
+        }
+
+
+# Singleton instance
+intent_router = IntentRouter(min_confidence=settings.fast_path_min_confidence)
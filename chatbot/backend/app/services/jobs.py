@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update
+from app.database import AsyncSessionLocal
+from app.models.chat import generate_uuid
+from app.models.indexing import IndexJob
+from app.services.context import context_service
+from app.services.indexing import IndexingPipeline
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class JobConflictError(Exception):
+    """Raised when a job is submitted for a collection that already has one running."""
+
+
+class JobManager:
+    """
+    Runs index, reindex and delete jobs in the background.
+
+    Jobs run as asyncio tasks in this process, one per Qdrant collection at a
+    time. Each job is recorded in the `index_jobs` table; live progress
+    (processed/total, rate, ETA) is kept in memory while the job runs.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}  # job_id -> task
+        self._running: Dict[str, str] = {}  # collection -> job_id
+        self._progress: Dict[str, Dict[str, Any]] = {}  # job_id -> live progress
+
+    async def recover(self):
+        """Mark jobs left running by a previous process as interrupted."""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(IndexJob)
+                .where(IndexJob.status == "running")
+                .values(status="interrupted", finished_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+
+    async def submit(
+        self,
+        kind: str,
+        mode: Optional[str] = None,
+        product_id: Optional[str] = None,
+        resume: bool = True,
+        collection: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        collection = collection or vector_store.products_collection
+        if collection in self._running:
+            raise JobConflictError(
+                f"Job {self._running[collection]} is already running for '{collection}'"
+            )
+
+        job = IndexJob(
+            id=generate_uuid(),
+            kind=kind,
+            collection=collection,
+            mode=mode,
+            product_id=product_id,
+            status="running",
+        )
+        # Claim the collection before awaiting so concurrent submits can't both start
+        self._running[collection] = job.id
+        try:
+            async with AsyncSessionLocal() as session:
+                session.add(job)
+                await session.commit()
+        except Exception:
+            del self._running[collection]
+            raise
+
+        self._progress[job.id] = {
+            "processed": 0,
+            "start_processed": 0,  # Carried over from a resumed checkpoint
+            "total": None,
+            "started": time.monotonic(),
+            "errors": [],
+        }
+        self._tasks[job.id] = asyncio.create_task(self._execute(job.id, kind, collection, mode, product_id, resume))
+        return await self.get(job.id)
+
+    async def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def shutdown(self):
+        for job_id in list(self._tasks):
+            await self.cancel(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as session:
+            job = await session.get(IndexJob, job_id)
+        return self._serialize(job) if job else None
+
+    async def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(IndexJob).order_by(IndexJob.created_at.desc()).limit(limit)
+            )
+            return [self._serialize(job) for job in result.scalars().all()]
+
+    async def _execute(
+        self,
+        job_id: str,
+        kind: str,
+        collection: str,
+        mode: Optional[str],
+        product_id: Optional[str],
+        resume: bool,
+    ):
+        progress = self._progress[job_id]
+        status, result = "completed", None
+        try:
+            if kind == "index":
+                progress["total"] = await context_service.count_products()
+                result = await IndexingPipeline(collection).run(
+                    mode=mode or "full",
+                    resume=resume,
+                    on_progress=lambda totals: progress.update(
+                        processed=totals["processed"],
+                        start_processed=totals["resumed_processed"],
+                        errors=totals["errors"],
+                    ),
+                )
+            elif kind == "reindex":
+                progress["total"] = 1
+                product = await context_service.get_product_for_index(product_id)
+                if not product:
+                    raise LookupError(f"Product {product_id} not found")
+                result = await asyncio.to_thread(vector_store.sync_products, [product])
+                if result["failed"]:
+                    raise RuntimeError(result["errors"][0])
+                progress["processed"] = 1
+            elif kind == "delete":
+                progress["total"] = 1
+                await asyncio.to_thread(vector_store.delete_product, product_id)
+                progress["processed"] = 1
+            else:
+                raise ValueError(f"Unknown job kind '{kind}'")
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as e:
+            logger.warning("Job %s (%s) failed: %s", job_id, kind, e)
+            status = "failed"
+            progress["errors"] = progress["errors"] + [str(e)]
+        finally:
+            await self._finish(job_id, collection, status, result)
+
+    async def _finish(self, job_id: str, collection: str, status: str, result: Optional[Dict[str, Any]]):
+        progress = self._progress.pop(job_id, {})
+        self._tasks.pop(job_id, None)
+        if self._running.get(collection) == job_id:
+            del self._running[collection]
+        context_service.invalidate_catalog_metadata()
+
+        async with AsyncSessionLocal() as session:
+            job = await session.get(IndexJob, job_id)
+            job.status = status
+            job.processed = progress.get("processed", 0)
+            job.total = progress.get("total")
+            job.errors = progress.get("errors") or None
+            job.result = result
+            job.finished_at = datetime.now(timezone.utc)
+            await session.commit()
+
+    def _serialize(self, job: IndexJob) -> Dict[str, Any]:
+        data = {
+            "job_id": job.id,
+            "kind": job.kind,
+            "collection": job.collection,
+            "mode": job.mode,
+            "product_id": job.product_id,
+            "status": job.status,
+            "processed": job.processed,
+            "total": job.total,
+            "errors": job.errors or [],
+            "result": job.result,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+
+        progress = self._progress.get(job.id)
+        if progress is not None:
+            elapsed = time.monotonic() - progress["started"]
+            processed, total = progress["processed"], progress["total"]
+            rate = (processed - progress["start_processed"]) / elapsed if elapsed > 0 else 0.0
+            data.update(
+                processed=processed,
+                total=total,
+                errors=progress["errors"],
+                rate_per_second=round(rate, 2),
+                eta_seconds=round((total - processed) / rate, 1) if rate and total else None,
+            )
+        return data
+
+
+# Singleton instance
+job_manager = JobManager()
@@ -0,0 +1,195 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "any", "do", "for", "have", "i", "in", "is", "me", "my",
+    "of", "on", "or", "show", "the", "to", "with", "you", "your",
+}
+
+# Field weights are applied by repeating a field's tokens in the document
+FIELD_WEIGHTS = {"name": 3, "category": 2, "description": 1, "features": 1}
+
+# Constant from the original reciprocal rank fusion paper
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def normalize_name(text: str) -> str:
+    return " ".join(TOKEN_RE.findall(text.lower()))
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Merge ranked hit lists by summing 1 / (RRF_K + rank) per product."""
+    scores: Dict[str, float] = defaultdict(float)
+    hits: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, 1):
+            scores[hit["id"]] += 1.0 / (RRF_K + rank)
+            hits.setdefault(hit["id"], hit)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [{**hits[point_id], "score": scores[point_id]} for point_id in ranked]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over product name, category, description
+    and features.
+
+    Exact product names and distinctive keywords resolve here without an
+    embedding call; fuzzier queries are fused with vector hits.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    # A lexical top hit is trusted on its own when every query term is in its
+    # name and it outscores the runner-up by this factor
+    CONFIDENT_SCORE_RATIO = 1.5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._names: Dict[str, str] = {}  # normalized name -> point id
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._payloads)
+
+    def build(self, documents: Iterable[tuple]):
+        """Replace the index contents with (point_id, payload) pairs."""
+        with self._lock:
+            self._payloads.clear()
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._names.clear()
+            self._total_len = 0
+            for point_id, payload in documents:
+                self._add(str(point_id), payload)
+
+    def upsert(self, points: Iterable[Any]):
+        """Add or replace points (objects with id and payload)."""
+        with self._lock:
+            for point in points:
+                self._remove(str(point.id))
+                self._add(str(point.id), point.payload)
+
+    def update_payloads(self, updates: Dict[str, Dict[str, Any]]):
+        """Merge payload fields (e.g. price/stock) for indexed points."""
+        with self._lock:
+            for point_id, changed in updates.items():
+                if point_id in self._payloads:
+                    self._payloads[point_id] = {**self._payloads[point_id], **changed}
+
+    def delete(self, point_ids: Iterable[str]):
+        """Remove points by id."""
+        with self._lock:
+            for point_id in point_ids:
+                self._remove(str(point_id))
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """BM25-ranked hits shaped like vector search results, optionally filtered by payload."""
+        terms = tokenize(query)
+        with self._lock:
+            if not terms or not self._payloads:
+                return []
+
+            n_docs = len(self._payloads)
+            avg_len = self._total_len / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for point_id, tf in postings.items():
+                    if where is not None and not where(self._payloads[point_id]):
+                        continue
+                    norm = 1 - self.b + self.b * self._doc_len[point_id] / avg_len
+                    scores[point_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+            ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+            return [{"id": point_id, "score": scores[point_id], **self._payloads[point_id]} for point_id in ranked]
+
+    def exact_match(
+        self,
+        query: str,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """The product whose name equals the query, ignoring case and punctuation."""
+        with self._lock:
+            point_id = self._names.get(normalize_name(query))
+            if point_id is None:
+                return None
+            if where is not None and not where(self._payloads[point_id]):
+                return None
+            return {"id": point_id, "score": 1.0, **self._payloads[point_id]}
+
+    def is_confident(self, query: str, hits: List[Dict[str, Any]]) -> bool:
+        """Whether the lexical top hit is clearly the product being asked for."""
+        if not hits:
+            return False
+        terms = set(tokenize(query))
+        name_terms = set(tokenize(hits[0].get("name", "")))
+        if not terms or not terms <= name_terms:
+            return False
+        if len(hits) == 1:
+            return True
+        return hits[0]["score"] >= self.CONFIDENT_SCORE_RATIO * hits[1]["score"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "documents": len(self._payloads),
+            "terms": len(self._postings),
+        }
+
+    def _add(self, point_id: str, payload: Dict[str, Any]):
+        terms: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = payload.get(field, "")
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            for term in tokenize(str(value)):
+                terms[term] += weight
+
+        self._payloads[point_id] = payload
+        self._doc_terms[point_id] = terms
+        self._doc_len[point_id] = sum(terms.values())
+        self._total_len += self._doc_len[point_id]
+        for term, tf in terms.items():
+            self._postings[term][point_id] = tf
+        name = normalize_name(payload.get("name", ""))
+        if name:
+            self._names[name] = point_id
+
+    def _remove(self, point_id: str):
+        payload = self._payloads.pop(point_id, None)
+        if payload is None:
+            return
+        for term in self._doc_terms.pop(point_id):
+            postings = self._postings[term]
+            postings.pop(point_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(point_id)
+        name = normalize_name(payload.get("name", ""))
+        if self._names.get(name) == point_id:
+            del self._names[name]
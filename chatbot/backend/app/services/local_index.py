@@ -0,0 +1,337 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Rows scored per block; keeps float16 -> float32 upcasts small
+SEARCH_BLOCK_ROWS = 8192
+
+SEGMENT_RE = re.compile(r"segment-(\d+)\.npy")
+
+# Files of the earlier single-file layout, removed on the next rebuild
+LEGACY_FILES = ("vectors.npy", "meta.json")
+
+
+class LocalVectorIndex:
+    """
+    In-process mirror of the Qdrant products collection.
+
+    Vectors are L2-normalized and stored in immutable, memory-mapped `.npy`
+    segment files, so cosine top-k is a handful of matrix-vector products
+    with no network round trip. An upsert writes one new segment holding
+    only its own rows. Point ids, their (segment, row) location and payloads
+    live in a SQLite file, so payload updates and deletes never touch vector
+    data. Replaced and deleted rows are skipped at search time and dropped
+    when the segments are compacted into a new one.
+
+    Segment files are never rewritten in place (a memory-mapped file cannot
+    be replaced on Windows); files no longer referenced are deleted, or
+    retried later if a search still has them mapped. Qdrant remains the
+    source of truth; this index is rebuilt from it or updated by the
+    indexing pipeline.
+    """
+
+    # Compact when there are more segments than this, or more dead rows than live ones
+    MAX_SEGMENTS = 16
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        self.path = path
+        self.dtype = np.float16 if dtype == "float16" else np.float32
+        self._lock = threading.Lock()  # Guards the in-memory state read by search
+        self._write_lock = threading.Lock()  # Serializes writers and the SQLite connection
+        self._conn: Optional[sqlite3.Connection] = None
+        self._segments: Dict[str, np.ndarray] = {}
+        self._locations: Dict[str, Tuple[str, int]] = {}  # point id -> (segment, row)
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._view: Optional[List[tuple]] = None  # Live rows per segment, rebuilt after writes
+        self._next_segment = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._locations) > 0
+
+    @property
+    def _db_file(self) -> str:
+        return os.path.join(self.path, "points.db")
+
+    def _segment_file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def load(self) -> bool:
+        """Open a previously saved index; returns False if none exists."""
+        if not os.path.exists(self._db_file):
+            return False
+        with self._write_lock:
+            rows = self._db().execute("SELECT id, segment, row, payload FROM points").fetchall()
+            if not rows:
+                return False
+
+            segments = {}
+            for name in {segment for _, segment, _, _ in rows}:
+                if not os.path.exists(self._segment_file(name)):
+                    return False
+                matrix = np.load(self._segment_file(name), mmap_mode="r")
+                if matrix.dtype != self.dtype:
+                    return False
+                segments[name] = matrix
+            if any(row >= segments[segment].shape[0] for _, segment, row, _ in rows):
+                return False
+
+            with self._lock:
+                self._segments = segments
+                self._locations = {point_id: (segment, row) for point_id, segment, row, _ in rows}
+                self._payloads = {point_id: json.loads(payload) for point_id, _, _, payload in rows}
+                self._view = None
+            self._remove_unused_files()
+        return True
+
+    def sync_from_qdrant(self, client, collection_name: str, page_size: int = 256) -> int:
+        """Rebuild the index from every point in a Qdrant collection."""
+        with self._write_lock:
+            ids: List[str] = []
+            payloads: List[Dict[str, Any]] = []
+            vectors: List[List[float]] = []
+            offset = None
+            while True:
+                records, offset = client.scroll(
+                    collection_name=collection_name,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                for record in records:
+                    ids.append(str(record.id))
+                    payloads.append(record.payload or {})
+                    vectors.append(record.vector)
+                if offset is None:
+                    break
+
+            segments: Dict[str, np.ndarray] = {}
+            locations: Dict[str, Tuple[str, int]] = {}
+            if vectors:
+                name, matrix = self._write_segment(self._normalize(np.asarray(vectors, dtype=np.float32)))
+                segments[name] = matrix
+                locations = {point_id: (name, row) for row, point_id in enumerate(ids)}
+
+            with self._db() as conn:
+                conn.execute("DELETE FROM points")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO points (id, segment, row, payload) VALUES (?, ?, ?, ?)",
+                    [(point_id, *locations[point_id], json.dumps(payload)) for point_id, payload in zip(ids, payloads)],
+                )
+
+            with self._lock:
+                self._segments = segments
+                self._locations = locations
+                self._payloads = dict(zip(ids, payloads))
+                self._view = None
+            self._remove_unused_files()
+            return len(ids)
+
+    def upsert(self, points: Iterable[Any]):
+        """Add or replace points (objects with id, vector and payload)."""
+        points = list(points)
+        if not points:
+            return
+        with self._write_lock:
+            name, matrix = self._write_segment(
+                self._normalize(np.asarray([point.vector for point in points], dtype=np.float32))
+            )
+            records = [(str(point.id), name, row, point.payload or {}) for row, point in enumerate(points)]
+            with self._db() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO points (id, segment, row, payload) VALUES (?, ?, ?, ?)",
+                    [(point_id, segment, row, json.dumps(payload)) for point_id, segment, row, payload in records],
+                )
+
+            with self._lock:
+                self._segments = {**self._segments, name: matrix}
+                for point_id, segment, row, payload in records:
+                    self._locations[point_id] = (segment, row)
+                    self._payloads[point_id] = payload
+                self._view = None
+            self._compact_if_needed()
+
+    def update_payloads(self, updates: Dict[str, Dict[str, Any]]):
+        """Merge payload fields for existing points, keyed by point id."""
+        with self._write_lock:
+            with self._lock:
+                changed = {
+                    point_id: {**self._payloads[point_id], **fields}
+                    for point_id, fields in updates.items()
+                    if point_id in self._payloads
+                }
+            if not changed:
+                return
+            with self._db() as conn:
+                conn.executemany(
+                    "UPDATE points SET payload = ? WHERE id = ?",
+                    [(json.dumps(payload), point_id) for point_id, payload in changed.items()],
+                )
+            with self._lock:
+                self._payloads.update(changed)
+                self._view = None
+
+    def delete(self, point_ids: Iterable[str]):
+        """Remove points by id."""
+        with self._write_lock:
+            with self._lock:
+                drop = [point_id for point_id in set(point_ids) if point_id in self._locations]
+            if not drop:
+                return
+            with self._db() as conn:
+                conn.executemany("DELETE FROM points WHERE id = ?", [(point_id,) for point_id in drop])
+            with self._lock:
+                for point_id in drop:
+                    del self._locations[point_id]
+                    del self._payloads[point_id]
+                self._view = None
+            self._compact_if_needed()
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k cosine search; returns hits shaped like Qdrant results.
+
+        `where` restricts the candidates to points whose payload it accepts.
+        """
+        view = self._search_view()
+        if not view:
+            return []
+
+        query = self._normalize(np.asarray([query_vector], dtype=np.float32))[0]
+        all_scores: List[np.ndarray] = []
+        ids: List[str] = []
+        payloads: List[Dict[str, Any]] = []
+        for matrix, rows, segment_ids, segment_payloads in view:
+            scores = np.empty(matrix.shape[0], dtype=np.float32)
+            for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+                block = matrix[start:start + SEARCH_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+            scores = scores[rows]
+            if where is not None:
+                accepted = np.fromiter((where(p) for p in segment_payloads), dtype=bool, count=len(segment_payloads))
+                scores[~accepted] = -np.inf
+            all_scores.append(scores)
+            ids.extend(segment_ids)
+            payloads.extend(segment_payloads)
+
+        scores = np.concatenate(all_scores)
+        k = min(limit, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": ids[i], "score": float(scores[i]), **payloads[i]}
+            for i in top
+        ]
+
+    def documents(self) -> List[tuple]:
+        """(point_id, payload) pairs for every indexed point."""
+        with self._lock:
+            return list(self._payloads.items())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = sum(matrix.shape[0] for matrix in self._segments.values())
+            return {
+                "ready": self.ready,
+                "points": len(self._locations),
+                "segments": len(self._segments),
+                "dead_rows": rows - len(self._locations),
+                "dtype": np.dtype(self.dtype).name,
+                "path": self.path,
+            }
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._conn = sqlite3.connect(self._db_file, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS points ("
+                "id TEXT PRIMARY KEY, segment TEXT NOT NULL, row INTEGER NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.commit()
+            existing = [int(m.group(1)) for f in os.listdir(self.path) if (m := SEGMENT_RE.fullmatch(f))]
+            self._next_segment = max(existing, default=-1) + 1
+        return self._conn
+
+    def _write_segment(self, vectors: np.ndarray) -> Tuple[str, np.ndarray]:
+        """Write vectors to a new segment file and open it memory-mapped."""
+        self._db()  # Sets the next segment number
+        name = f"segment-{self._next_segment:06d}.npy"
+        self._next_segment += 1
+        tmp = self._segment_file(name) + ".tmp.npy"
+        np.save(tmp, vectors.astype(self.dtype, copy=False))
+        os.replace(tmp, self._segment_file(name))  # A new name; never a mapped file
+        return name, np.load(self._segment_file(name), mmap_mode="r")
+
+    def _compact_if_needed(self):
+        """Merge live rows into one new segment when segments or dead rows pile up."""
+        with self._lock:
+            live = {segment for segment, _ in self._locations.values()}
+            if live != set(self._segments):
+                # Drop segments whose rows were all replaced or deleted
+                self._segments = {name: m for name, m in self._segments.items() if name in live}
+                self._view = None
+            rows = sum(matrix.shape[0] for matrix in self._segments.values())
+            needed = len(self._segments) > self.MAX_SEGMENTS or rows - len(self._locations) > len(self._locations)
+            locations = list(self._locations.items())
+            segments = self._segments
+
+        if needed and locations:
+            vectors = np.empty((len(locations), segments[locations[0][1][0]].shape[1]), dtype=self.dtype)
+            for i, (_, (segment, row)) in enumerate(locations):
+                vectors[i] = segments[segment][row]
+            name, matrix = self._write_segment(vectors)
+            with self._db() as conn:
+                conn.executemany(
+                    "UPDATE points SET segment = ?, row = ? WHERE id = ?",
+                    [(name, row, point_id) for row, (point_id, _) in enumerate(locations)],
+                )
+            with self._lock:
+                self._segments = {name: matrix}
+                self._locations = {point_id: (name, row) for row, (point_id, _) in enumerate(locations)}
+                self._view = None
+        self._remove_unused_files()
+
+    def _remove_unused_files(self):
+        with self._lock:
+            in_use = set(self._segments)
+        for name in os.listdir(self.path):
+            unused = SEGMENT_RE.fullmatch(name) and name not in in_use
+            if unused or name in LEGACY_FILES or name.endswith(".tmp.npy"):
+                try:
+                    os.remove(self._segment_file(name))
+                except OSError:
+                    pass  # Still mapped by a running search (Windows); removed next time
+
+    def _search_view(self) -> List[tuple]:
+        """(matrix, live rows, ids, payloads) per segment, rebuilt after writes."""
+        with self._lock:
+            if self._view is None:
+                by_segment: Dict[str, Tuple[List[int], List[str]]] = {}
+                for point_id, (segment, row) in self._locations.items():
+                    rows, ids = by_segment.setdefault(segment, ([], []))
+                    rows.append(row)
+                    ids.append(point_id)
+                self._view = [
+                    (self._segments[segment], np.asarray(rows, dtype=np.intp), ids, [self._payloads[i] for i in ids])
+                    for segment, (rows, ids) in by_segment.items()
+                ]
+            return self._view
@@ -0,0 +1,54 @@
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+
+
+class Metrics:
+    """
+    In-process counters and timing summaries.
+
+    Timings keep a rolling window of recent samples per name, which is enough
+    for p50/p95 on an admin endpoint without an external metrics backend.
+    """
+
+    WINDOW = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.WINDOW))
+        self._timing_counts: Dict[str, int] = defaultdict(int)
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self._timings[name].append(seconds)
+            self._timing_counts[name] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: sorted(samples) for name, samples in self._timings.items()}
+            counts = dict(self._timing_counts)
+
+        return {
+            "counters": counters,
+            "timings": {
+                name: {
+                    "count": counts[name],
+                    "avg_ms": round(sum(samples) / len(samples) * 1000, 1),
+                    "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+                    "max_ms": round(samples[-1] * 1000, 1),
+                }
+                for name, samples in timings.items()
+                if samples
+            },
+        }
+
+
+# Singleton instance
+metrics = Metrics()
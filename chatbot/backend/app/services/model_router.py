@@ -0,0 +1,75 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict
+from app.config import get_settings
+from app.services.metrics import metrics
+
+settings = get_settings()
+
+TIERS = ("fast", "large")
+
+# Signs that a turn needs reasoning across several products
+REASONING_RE = re.compile(
+    r"\b(compare|comparison|vs|versus|difference|differences|better|best|between|which one"
+    r"|recommend\w*|suggest\w*|gift|alternatives?|instead|bundle|budget|pros|cons|worth)\b"
+)
+
+
+class ModelRouter:
+    """
+    Picks the model tier for an agent run.
+
+    Short, simple turns (greetings, thanks, one-line follow-ups, single
+    lookups) use the fast model. Long messages and anything that asks to
+    compare, recommend or weigh products escalate to the large model. Both
+    tiers share the same instructions and tools; latency and token usage are
+    recorded per tier.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"turns": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+        )
+
+    def choose(self, message: str) -> str:
+        if not settings.model_routing_enabled:
+            return "large"
+        text = message.lower()
+        if len(text.split()) > settings.fast_model_max_words:
+            return "large"
+        if REASONING_RE.search(text) or text.count("?") > 1:
+            return "large"
+        return "fast"
+
+    def model_for(self, tier: str) -> str:
+        return settings.agent_model_fast if tier == "fast" else settings.agent_model_large
+
+    def record(self, tier: str, elapsed_seconds: float, usage: Any):
+        """Record one agent run; `usage` is the agents SDK Usage of the run."""
+        stats = self._stats[tier]
+        stats["turns"] += 1
+        stats["seconds"] += elapsed_seconds
+        stats["input_tokens"] += getattr(usage, "input_tokens", 0)
+        stats["output_tokens"] += getattr(usage, "output_tokens", 0)
+        metrics.observe(f"chat.agent.{tier}", elapsed_seconds)
+        metrics.incr(f"chat.agent.{tier}.input_tokens", getattr(usage, "input_tokens", 0))
+        metrics.incr(f"chat.agent.{tier}.output_tokens", getattr(usage, "output_tokens", 0))
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for tier in TIERS:
+            stats = self._stats[tier]
+            turns = stats["turns"]
+            result[tier] = {
+                "model": self.model_for(tier),
+                "turns": turns,
+                "avg_ms": round(stats["seconds"] / turns * 1000, 1) if turns else 0.0,
+                "input_tokens": stats["input_tokens"],
+                "output_tokens": stats["output_tokens"],
+                "avg_tokens": round((stats["input_tokens"] + stats["output_tokens"]) / turns) if turns else 0,
+            }
+        return result
+
+
+# Singleton instance
+model_router = ModelRouter()
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from qdrant_client.http import models
+
+# Payload fields that structured filters run on, with their Qdrant index type
+FILTERABLE_FIELDS = {
+    "category": models.PayloadSchemaType.KEYWORD,
+    "price": models.PayloadSchemaType.FLOAT,
+    "rating": models.PayloadSchemaType.FLOAT,
+    "stock": models.PayloadSchemaType.INTEGER,
+}
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """
+    Structured constraints applied alongside a product search.
+
+    Pushed down to Qdrant as a payload filter, and evaluated per payload by
+    the in-process local and lexical indexes.
+    """
+
+    category: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_rating: Optional[float] = None
+    in_stock: Optional[bool] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return all(value is None for value in vars(self).values())
+
+    def to_qdrant(self) -> Optional[models.Filter]:
+        must: List[models.FieldCondition] = []
+        if self.category is not None:
+            must.append(models.FieldCondition(key="category", match=models.MatchValue(value=self.category)))
+        if self.min_price is not None or self.max_price is not None:
+            must.append(models.FieldCondition(key="price", range=models.Range(gte=self.min_price, lte=self.max_price)))
+        if self.min_rating is not None:
+            must.append(models.FieldCondition(key="rating", range=models.Range(gte=self.min_rating)))
+        if self.in_stock is not None:
+            stock_range = models.Range(gt=0) if self.in_stock else models.Range(lte=0)
+            must.append(models.FieldCondition(key="stock", range=stock_range))
+        return models.Filter(must=must) if must else None
+
+    def matches(self, payload: Dict[str, Any]) -> bool:
+        if self.category is not None and payload.get("category") != self.category:
+            return False
+        price = payload.get("price") or 0
+        if self.min_price is not None and price < self.min_price:
+            return False
+        if self.max_price is not None and price > self.max_price:
+            return False
+        if self.min_rating is not None and (payload.get("rating") or 0) < self.min_rating:
+            return False
+        if self.in_stock is not None and ((payload.get("stock") or 0) > 0) != self.in_stock:
+            return False
+        return True
@@ -0,0 +1,128 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.config import get_settings
+
+settings = get_settings()
+
+# Stands in for the customer's name in stored answers; filled in on a hit
+NAME_PLACEHOLDER = "\x00name\x00"
+
+
+@dataclass
+class CachedResponse:
+    answer: str
+    generation: int
+    created_at: float
+    elapsed_seconds: float  # What the original agent run took
+
+
+class SemanticResponseCache:
+    """
+    Agent answers to generic questions, looked up by query-embedding similarity.
+
+    Each entry records the catalog generation it was produced under, so any
+    write to the product index makes earlier answers unreachable. Only
+    answers that carry nothing user-specific are stored (see ShopEaseAgent).
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: Optional[int] = 3600, threshold: float = 0.95):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: List[CachedResponse] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._generation = 0  # Newest catalog generation seen
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.saved_seconds = 0.0
+
+    def get(self, embedding: List[float], generation: int) -> Optional[str]:
+        """The stored answer closest to the query, if it is similar enough and current."""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._expire(generation)
+            match = self._best_match(query)
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += match.elapsed_seconds
+            return match.answer
+
+    def set(self, embedding: List[float], answer: str, generation: int, elapsed_seconds: float):
+        query = self._normalize(embedding)
+        with self._lock:
+            if generation < self._generation:
+                return  # Computed before a catalog change that finished during the run
+            self._expire(generation)
+            if self._best_match(query) is not None:
+                return
+            if len(self._entries) >= self.max_size:
+                self._entries.pop(0)
+                self._vectors.pop(0)
+            self._entries.append(CachedResponse(answer, generation, time.monotonic(), elapsed_seconds))
+            self._vectors.append(query)
+            self._matrix = None
+            self.stores += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+    def _best_match(self, query: np.ndarray) -> Optional[CachedResponse]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+        scores = self._matrix @ query
+        best = int(np.argmax(scores))
+        return self._entries[best] if scores[best] >= self.threshold else None
+
+    def _expire(self, generation: int):
+        """Drop entries from an older catalog generation or past their TTL."""
+        self._generation = max(self._generation, generation)
+        now = time.monotonic()
+        keep = [
+            i for i, entry in enumerate(self._entries)
+            if entry.generation == self._generation
+            and (self.ttl_seconds is None or now - entry.created_at < self.ttl_seconds)
+        ]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = [self._vectors[i] for i in keep]
+            self._matrix = None
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# Singleton instance
+response_cache = SemanticResponseCache(
+    max_size=settings.response_cache_size,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    threshold=settings.response_cache_threshold,
+)
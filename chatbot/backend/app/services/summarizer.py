@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import Dict
+from openai import AsyncOpenAI
+from sqlalchemy import func, select
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.chat import ChatMessage, ChatThread
+from app.services.chat_writer import chat_writer
+from app.services.token_budget import truncate_to_tokens
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a ShopEase customer and the shopping assistant.
+Update the summary with the new messages. Keep what the customer wants, products and orders discussed, and any open questions.
+Answer with the summary only, in at most {max_words} words."""
+
+
+class ThreadSummarizer:
+    """
+    Folds messages that fall out of the history window into `ChatThread.summary`.
+
+    Runs after a turn is saved, in the background and at most once per
+    thread at a time, using a small model so the agent prompt keeps a short
+    memory of older turns instead of their full text.
+    """
+
+    def __init__(self):
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self._tasks: Dict[str, asyncio.Task] = {}  # thread_id -> task
+
+    def schedule(self, thread_id: str):
+        if thread_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(thread_id))
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(thread_id, None))
+
+    async def shutdown(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, thread_id: str):
+        try:
+            await self.summarize(thread_id)
+        except Exception as e:
+            logger.warning("Summarizing thread %s failed: %s", thread_id, e)
+
+    async def summarize(self, thread_id: str) -> bool:
+        """Fold unsummarized messages older than the history window; returns True if it did."""
+        await chat_writer.wait_for_thread(thread_id)
+        async with AsyncSessionLocal() as session:
+            thread = await session.get(ChatThread, thread_id)
+            if thread is None:
+                return False
+
+            unsummarized = ChatMessage.thread_id == thread_id
+            if thread.summarized_until is not None:
+                unsummarized = unsummarized & (ChatMessage.created_at > thread.summarized_until)
+
+            pending = await session.scalar(select(func.count()).where(unsummarized))
+            outside_window = pending - settings.chat_history_window
+            if outside_window < settings.summary_min_messages:
+                return False
+
+            result = await session.execute(
+                select(ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+                .where(unsummarized)
+                .order_by(ChatMessage.created_at)
+                .limit(outside_window)
+            )
+            rows = result.all()
+
+            transcript = "\n".join(
+                f"{role}: {truncate_to_tokens(content, settings.history_message_max_tokens)}"
+                for role, content, _ in rows
+            )
+            response = await self.client.chat.completions.create(
+                model=settings.summary_model,
+                max_tokens=settings.summary_max_tokens,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT.format(max_words=settings.summary_max_tokens * 3 // 4)},
+                    {"role": "user", "content": f"Current summary:\n{thread.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+                ],
+            )
+
+            thread.summary = response.choices[0].message.content.strip()
+            thread.summarized_until = rows[-1].created_at
+            await session.commit()
+            return True
+
+
+# Singleton instance
+thread_summarizer = ThreadSummarizer()
@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character estimate
+    tiktoken = None
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Character-based estimate used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+if tiktoken is not None:
+    try:
+        _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+    except Exception:
+        _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens]) + " …"
+    return text[:max_tokens * CHARS_PER_TOKEN] + " …"
+
+
+class TokenBudget:
+    """
+    Fits a prompt into a fixed token budget.
+
+    Priority, highest first: the new user message, short system notes, the
+    context prompt (truncated to at most half of what is left when there is
+    history to keep), then history from newest to oldest, each message
+    capped at `message_max_tokens`.
+    """
+
+    def __init__(self, max_tokens: int, message_max_tokens: int, reserved_tokens: int = 0):
+        self.max_tokens = max_tokens
+        self.message_max_tokens = message_max_tokens
+        self.reserved_tokens = reserved_tokens  # Instructions and tool schemas
+
+    def fit(
+        self,
+        system: List[Dict[str, str]],
+        history: List[Dict[str, str]],
+        message: Dict[str, str],
+        context: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, str]]:
+        remaining = self.max_tokens - self.reserved_tokens
+        remaining -= count_message_tokens(message)
+        remaining -= sum(count_message_tokens(m) for m in system)
+
+        if context is not None:
+            context_max = remaining // 2 if history else remaining
+            content = truncate_to_tokens(context["content"], context_max - MESSAGE_OVERHEAD_TOKENS)
+            context = {**context, "content": content} if content else None
+            if context:
+                remaining -= count_message_tokens(context)
+
+        kept: List[Dict[str, str]] = []
+        for msg in reversed(history):
+            msg = {**msg, "content": truncate_to_tokens(msg["content"], self.message_max_tokens)}
+            cost = count_message_tokens(msg)
+            if cost > remaining:
+                break
+            kept.append(msg)
+            remaining -= cost
+        kept.reverse()
+
+        return ([context] if context else []) + system + kept + [message]
@@ -0,0 +1,134 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.context import ORDER_REF_RE, OrderRecord, UserProfile, context_service
+from app.services.embeddings import embedding_service
+from app.services.lexical_index import reciprocal_rank_fusion
+from app.services.metrics import metrics
+from app.services.product_filters import ProductFilters
+from app.services.vector_store import vector_store
+
+# Fetch a little more than the prompt builder needs so the tools can reuse it
+# (the order tool lists 5 and checks for a 6th)
+ORDERS_PREFETCH = 6
+PRODUCTS_PREFETCH = 5
+
+
+class TurnContext:
+    """
+    Request-scoped lookups for a single chat turn.
+
+    Created by the chat router and shared with the prompt builder and the
+    agent tools (as the agents SDK run context), so each upstream call
+    (user profile, recent orders, query embedding, vector hits) happens at
+    most once per message.
+    """
+
+    def __init__(self, user_id: str, message: str):
+        self.user_id = user_id
+        self.message = message
+        self._user: Optional[asyncio.Future] = None
+        self._orders: Dict[int, asyncio.Future] = {}
+        self._embeddings: Dict[str, asyncio.Future] = {}
+        self._hits: Dict[Tuple[str, Optional[ProductFilters]], Dict[int, asyncio.Future]] = {}
+        self.context_used: List[str] = []  # Context sections in the prompt
+        self.dropped_context: List[str] = []  # Sources that missed their deadline or failed
+
+    async def get_user_context(self) -> UserProfile:
+        """User profile, fetched once per turn."""
+        if self._user is None:
+            self._user = asyncio.ensure_future(
+                context_service.get_user_context(self.user_id)
+            )
+        return await self._user
+
+    async def get_user_orders(self, limit: int = 5) -> List[OrderRecord]:
+        """Recent orders; smaller requests are served from a larger fetch."""
+        for fetched, future in self._orders.items():
+            if fetched >= limit:
+                return (await future)[:limit]
+
+        fetched = max(limit, ORDERS_PREFETCH)
+        future = asyncio.ensure_future(
+            context_service.get_user_orders(self.user_id, limit=fetched)
+        )
+        self._orders[fetched] = future
+        return (await future)[:limit]
+
+    async def get_order(self, order_ref: str) -> Optional[OrderRecord]:
+        """One of the user's orders by id or short number; recent orders are checked first."""
+        ref = order_ref.strip().lstrip("#").lower()
+        if not ORDER_REF_RE.fullmatch(ref):
+            return None  # Same rule as the database lookup: 4-24 hex characters
+        for order in await self.get_user_orders(limit=ORDERS_PREFETCH):
+            if order["order_id"].startswith(ref):
+                return order
+        return await context_service.get_user_order(self.user_id, order_ref)
+
+    async def get_query_embedding(self, query: str) -> List[float]:
+        """Cohere query embedding, computed once per distinct query text."""
+        future = self._embeddings.get(query)
+        if future is None:
+            future = asyncio.ensure_future(
+                asyncio.to_thread(embedding_service.embed_query, query)
+            )
+            self._embeddings[query] = future
+        return await future
+
+    async def search_products(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Optional[ProductFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        """Hybrid search hits for a query, reusing the turn's embedding."""
+        if filters is not None and filters.is_empty:
+            filters = None
+        by_limit = self._hits.setdefault((query, filters), {})
+        for fetched, future in by_limit.items():
+            if fetched >= limit:
+                return (await future)[:limit]
+
+        fetched = max(limit, PRODUCTS_PREFETCH)
+        future = asyncio.ensure_future(self._hybrid_search(query, fetched, filters))
+        by_limit[fetched] = future
+        return (await future)[:limit]
+
+    async def _hybrid_search(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[ProductFilters],
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse BM25 and vector hits with reciprocal rank fusion.
+
+        An exact product name, or a lexical top hit that is clearly the
+        product asked for, is returned without embedding the query.
+        """
+        lexical_index = vector_store.lexical_index
+        if not lexical_index or not lexical_index.ready:
+            return await self._vector_search(query, limit, filters)
+
+        where = filters.matches if filters else None
+        exact = lexical_index.exact_match(query, where)
+        lexical = lexical_index.search(query, limit, where)
+        if exact:
+            lexical = [exact] + [hit for hit in lexical if hit["id"] != exact["id"]]
+        if exact or lexical_index.is_confident(query, lexical):
+            metrics.incr("search.lexical_fast_path")
+            return lexical[:limit]
+
+        metrics.incr("search.hybrid")
+        vector = await self._vector_search(query, limit, filters)
+        if not lexical:
+            return vector
+        return reciprocal_rank_fusion([vector, lexical], limit)
+
+    async def _vector_search(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[ProductFilters],
+    ) -> List[Dict[str, Any]]:
+        embedding = await self.get_query_embedding(query)
+        return await asyncio.to_thread(vector_store.search_by_vector, embedding, limit, filters)
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+
+class UserContextCache:
+    """
+    Per-user cache of the profile and recent orders read from MongoDB.
+
+    Entries expire after a TTL and are evicted LRU; the Node backend calls
+    the admin invalidate endpoint when an order is placed or changes status,
+    or a profile is edited, so warm turns never go stale for long. A
+    per-user version guards against a fetch that started before an
+    invalidation writing its stale result afterwards.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[int] = 300):
+        self.profiles = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.orders = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._versions = TTLCache(max_size=max_size)
+        self.invalidations = 0
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.profiles.get(user_id)
+
+    def set_profile(self, user_id: str, profile: Dict[str, Any], version: int):
+        if version == self.version(user_id):
+            self.profiles.set(user_id, profile)
+
+    def get_orders(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Cached recent orders, if at least `limit` of them were fetched."""
+        entry: Optional[Tuple[int, List[Dict[str, Any]]]] = self.orders.get(user_id)
+        if entry is None or entry[0] < limit:
+            return None
+        return entry[1][:limit]
+
+    def set_orders(self, user_id: str, limit: int, orders: List[Dict[str, Any]], version: int):
+        if version == self.version(user_id):
+            self.orders.set(user_id, (limit, orders))
+
+    def invalidate(self, user_id: str, scope: str = "all"):
+        """Drop a user's cached orders, profile, or both."""
+        self._versions.set(user_id, self.version(user_id) + 1)
+        if scope in ("all", "orders"):
+            self.orders.delete(user_id)
+        if scope in ("all", "profile"):
+            self.profiles.delete(user_id)
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profiles": self.profiles.stats(),
+            "orders": self.orders.stats(),
+            "invalidations": self.invalidations,
+        }
+
+
+# Singleton instance
+user_context_cache = UserContextCache(
+    max_size=settings.user_context_cache_size,
+    ttl_seconds=settings.user_context_cache_ttl_seconds,
+)
@@ -1,11 +1,19 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import logging
+import time
 import uuid
 from app.config import get_settings
 from app.services.embeddings import embedding_service
+from app.services.lexical_index import LexicalIndex
+from app.services.local_index import LocalVectorIndex
+from app.services.product_filters import FILTERABLE_FIELDS, ProductFilters
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def mongo_id_to_uuid(mongo_id: str) -> str:
@@ -14,6 +22,35 @@ def mongo_id_to_uuid(mongo_id: str) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, mongo_id))
 
 
+# Payload fields that can change without re-embedding (not part of the product text)
+PAYLOAD_ONLY_FIELDS = ("price", "stock", "image", "rating")
+
+
+def build_product_text(product: Dict[str, Any]) -> str:
+    """
+    Create rich text for embedding a product.
+
+    Only descriptive fields go in here; price, stock and rating live in the
+    payload so changing them never requires a new embedding.
+    """
+    return f"""
+            Product: {product.get('name', '')}
+            Category: {product.get('category', '')}
+            Description: {product.get('description', '')}
+            Features: {', '.join(product.get('features', []))}
+            """.strip()
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of the embedding text, stored in each point's payload."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 class VectorStoreService:
     def __init__(self):
         self.client = QdrantClient(
@@ -21,9 +58,25 @@ class VectorStoreService:
             api_key=settings.qdrant_api_key,
         )
         self.products_collection = settings.products_collection
+        self._ensured_collections: Set[str] = set()
+
+        # Optional in-process mirrors used for search; Qdrant stays the source of truth
+        self.local_index: Optional[LocalVectorIndex] = None
+        if settings.vector_search_backend == "local":
+            self.local_index = LocalVectorIndex(settings.local_index_path, settings.local_index_dtype)
+        self.lexical_index: Optional[LexicalIndex] = LexicalIndex() if settings.hybrid_search_enabled else None
+
+        # Every write to the collection is applied to each mirror as well
+        self.mirrors = [m for m in (self.local_index, self.lexical_index) if m is not None]
+
+        # Bumped on every catalog write so caches keyed on search results can expire
+        self.generation = 0
 
     def ensure_collection(self, collection_name: str, vector_size: int = 1024):
-        """Create collection if it doesn't exist."""
+        """Create collection if it doesn't exist, with payload indexes for filtering."""
+        if collection_name in self._ensured_collections:
+            return
+
         collections = self.client.get_collections().collections
         exists = any(c.name == collection_name for c in collections)
 
@@ -36,53 +89,236 @@ class VectorStoreService:
                 ),
             )
 
-    def upsert_products(self, products: List[Dict[str, Any]]):
-        """Index products into Qdrant."""
+        # Collections created before filtering existed get their indexes here too
+        indexed = self.client.get_collection(collection_name).payload_schema or {}
+        for field, schema in FILTERABLE_FIELDS.items():
+            if field not in indexed:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=schema,
+                )
+        self._ensured_collections.add(collection_name)
+
+    def upsert_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Index products into Qdrant.
+
+        Texts are embedded in provider-sized batches on a bounded thread pool,
+        and each batch is upserted in chunks as soon as its embeddings arrive,
+        so Cohere and Qdrant calls overlap. Failed calls are retried with
+        backoff; products in batches that still fail are reported, not raised.
+        """
         self.ensure_collection(self.products_collection)
+        started = time.perf_counter()
 
-        points = []
-        for product in products:
-            # Create rich text for embedding
-            text = f"""
-            Product: {product.get('name', '')}
-            Category: {product.get('category', '')}
-            Description: {product.get('description', '')}
-            Price: ${product.get('price', 0)}
-            Features: {', '.join(product.get('features', []))}
-            """.strip()
+        indexed = 0
+        failed_ids: List[str] = []
+        errors: List[str] = []
+
+        batches = chunked(products, settings.embed_batch_size)
+        with ThreadPoolExecutor(max_workers=settings.index_concurrency) as pool:
+            futures = {
+                pool.submit(
+                    self._with_retry,
+                    embedding_service.embed_batch,
+                    [build_product_text(p) for p in batch],
+                ): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    embeddings = future.result()
+                    points = [
+                        self._product_point(product, embedding)
+                        for product, embedding in zip(batch, embeddings)
+                    ]
+                    for chunk in chunked(points, settings.upsert_batch_size):
+                        self._with_retry(
+                            self.client.upsert,
+                            collection_name=self.products_collection,
+                            points=chunk,
+                        )
+                        for mirror in self.mirrors:
+                            mirror.upsert(chunk)
+                        self.generation += 1
+                    indexed += len(points)
+                except Exception as e:
+                    logger.warning("Indexing batch of %d products failed: %s", len(batch), e)
+                    failed_ids.extend(str(p.get('_id')) for p in batch)
+                    errors.append(str(e))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "indexed": indexed,
+            "failed": len(failed_ids),
+            "failed_ids": failed_ids,
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "products_per_second": round(indexed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def sync_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Delta-index products against what is already stored in Qdrant.
 
-            embedding = embedding_service.embed_text(text)
-
-            mongo_id = str(product.get('_id'))
-            points.append(models.PointStruct(
-                id=mongo_id_to_uuid(mongo_id),
-                vector=embedding,
-                payload={
-                    "mongo_id": mongo_id,  # Keep original ID for reference
-                    "name": product.get('name', ''),
-                    "description": product.get('description', ''),
-                    "price": product.get('price', 0),
-                    "category": product.get('category', ''),
-                    "stock": product.get('stock', 0),
-                    "image": product.get('image', ''),
-                    "features": product.get('features', []),
-                    "rating": product.get('rating', 0),
-                }
-            ))
-
-        if points:
-            self.client.upsert(
+        Products whose content hash changed (or that are new) are re-embedded;
+        products with only price/stock/image/rating changes get a payload
+        update; everything else is left untouched.
+        """
+        self.ensure_collection(self.products_collection)
+        started = time.perf_counter()
+
+        ids = [mongo_id_to_uuid(str(p.get('_id'))) for p in products]
+        existing = {
+            str(record.id): record.payload or {}
+            for record in self._with_retry(
+                self.client.retrieve,
+                collection_name=self.products_collection,
+                ids=ids,
+                with_payload=True,
+                with_vectors=False,
+            )
+        }
+
+        to_embed: List[Dict[str, Any]] = []
+        payload_updates: List[models.SetPayloadOperation] = []
+        for point_id, product in zip(ids, products):
+            stored = existing.get(point_id)
+            payload = self._product_payload(product)
+            if stored is None or stored.get("content_hash") != payload["content_hash"]:
+                to_embed.append(product)
+                continue
+
+            changed = {
+                field: payload[field]
+                for field in PAYLOAD_ONLY_FIELDS
+                if stored.get(field) != payload[field]
+            }
+            if changed:
+                payload_updates.append(models.SetPayloadOperation(
+                    set_payload=models.SetPayload(payload=changed, points=[point_id])
+                ))
+
+        for chunk in chunked(payload_updates, settings.upsert_batch_size):
+            self._with_retry(
+                self.client.batch_update_points,
                 collection_name=self.products_collection,
-                points=points,
+                update_operations=chunk,
             )
+        if payload_updates:
+            updates = {op.set_payload.points[0]: op.set_payload.payload for op in payload_updates}
+            for mirror in self.mirrors:
+                mirror.update_payloads(updates)
+            self.generation += 1
 
-    def search_products(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        stats = self.upsert_products(to_embed) if to_embed else {
+            "indexed": 0, "failed": 0, "failed_ids": [], "errors": [],
+        }
+        elapsed = time.perf_counter() - started
+        return {
+            **stats,
+            "embedded": stats["indexed"],
+            "payload_updated": len(payload_updates),
+            "unchanged": len(products) - len(to_embed) - len(payload_updates),
+            "elapsed_seconds": round(elapsed, 3),
+            "products_per_second": round(len(products) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def delete_missing(self, keep_mongo_ids: Set[str]) -> int:
+        """Delete points whose MongoDB product no longer exists."""
+        stale: List[str] = []
+        offset = None
+        while True:
+            records, offset = self._with_retry(
+                self.client.scroll,
+                collection_name=self.products_collection,
+                limit=settings.upsert_batch_size,
+                offset=offset,
+                with_payload=["mongo_id"],
+                with_vectors=False,
+            )
+            stale.extend(
+                str(r.id) for r in records
+                if (r.payload or {}).get("mongo_id") not in keep_mongo_ids
+            )
+            if offset is None:
+                break
+
+        for chunk in chunked(stale, settings.upsert_batch_size):
+            self._with_retry(
+                self.client.delete,
+                collection_name=self.products_collection,
+                points_selector=models.PointIdsList(points=chunk),
+            )
+        if stale:
+            for mirror in self.mirrors:
+                mirror.delete(stale)
+            self.generation += 1
+        return len(stale)
+
+    def _product_point(self, product: Dict[str, Any], embedding: List[float]) -> models.PointStruct:
+        return models.PointStruct(
+            id=mongo_id_to_uuid(str(product.get('_id'))),
+            vector=embedding,
+            payload=self._product_payload(product),
+        )
+
+    @staticmethod
+    def _product_payload(product: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "mongo_id": str(product.get('_id')),  # Keep original ID for reference
+            "name": product.get('name', ''),
+            "description": product.get('description', ''),
+            "price": product.get('price', 0),
+            "category": product.get('category', ''),
+            "stock": product.get('stock', 0),
+            "image": product.get('image', ''),
+            "features": product.get('features', []),
+            "rating": product.get('rating', 0),
+            "content_hash": content_hash(build_product_text(product)),
+        }
+
+    @staticmethod
+    def _with_retry(func: Callable, *args, **kwargs):
+        """Call func, retrying with exponential backoff on failure."""
+        attempts = settings.index_max_retries + 1
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(settings.index_retry_backoff_seconds * (2 ** attempt))
+
+    def search_products(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Optional[ProductFilters] = None,
+    ) -> List[Dict[str, Any]]:
         """Search for relevant products."""
         query_embedding = embedding_service.embed_query(query)
+        return self.search_by_vector(query_embedding, limit, filters)
+
+    def search_by_vector(
+        self,
+        query_embedding: List[float],
+        limit: int = 5,
+        filters: Optional[ProductFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search for relevant products with an already computed query embedding."""
+        if filters is not None and filters.is_empty:
+            filters = None
+
+        if self.local_index and self.local_index.ready:
+            return self.local_index.search(query_embedding, limit, where=filters.matches if filters else None)
 
         results = self.client.query_points(
             collection_name=self.products_collection,
             query=query_embedding,
+            query_filter=filters.to_qdrant() if filters else None,
             limit=limit,
         )
 
@@ -97,10 +333,54 @@ class VectorStoreService:
 
     def delete_product(self, product_id: str):
         """Delete a product from the index."""
+        point_id = mongo_id_to_uuid(product_id)
         self.client.delete(
             collection_name=self.products_collection,
-            points_selector=models.PointIdsList(points=[mongo_id_to_uuid(product_id)]),
+            points_selector=models.PointIdsList(points=[point_id]),
         )
+        for mirror in self.mirrors:
+            mirror.delete([point_id])
+        self.generation += 1
+
+    def load_search_indexes(self):
+        """
+        Prepare the in-process search mirrors at startup.
+
+        The local vector index is opened from disk (or mirrored from Qdrant if
+        there is none); the lexical index is built from the same payloads, or
+        from a payload-only scroll of Qdrant.
+        """
+        if self.local_index and not self.local_index.load():
+            self.local_index.sync_from_qdrant(self.client, self.products_collection)
+
+        if self.lexical_index:
+            if self.local_index and self.local_index.ready:
+                self.lexical_index.build(self.local_index.documents())
+            else:
+                self.lexical_index.build(self._scroll_payloads())
+
+    def _scroll_payloads(self):
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.products_collection,
+                limit=settings.upsert_batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            for record in records:
+                yield str(record.id), record.payload or {}
+            if offset is None:
+                break
+
+    def sync_local_index(self) -> int:
+        """Rebuild the local index from Qdrant."""
+        if not self.local_index:
+            return 0
+        synced = self.local_index.sync_from_qdrant(self.client, self.products_collection)
+        self.generation += 1
+        return synced
 
 
 # Singleton instance
@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime
+from typing import Any, Tuple
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import aliased
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for a row ordered by (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def cursor_condition(model: Any, cursor: str, before: bool) -> Any:
+    """
+    Rows of `model` strictly before (or after) the cursor row in
+    (created_at, id) order; raises ValueError for malformed cursors.
+
+    The comparison uses the cursor row's stored created_at. SQLite keeps
+    timestamps as text, and rows written by server_default=func.now() have
+    no microseconds, so the decoded datetime would not equal them. The
+    decoded value is only used if the cursor row has since been deleted.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    row = aliased(model)
+    stored = func.coalesce(
+        select(row.created_at).where(row.id == row_id).scalar_subquery(),
+        created_at,
+    )
+    if before:
+        return or_(model.created_at < stored, and_(model.created_at == stored, model.id < row_id))
+    return or_(model.created_at > stored, and_(model.created_at == stored, model.id > row_id))
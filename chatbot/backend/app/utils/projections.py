@@ -0,0 +1,35 @@
+# Order line items shown in the prompt and tools
+ORDER_ITEMS_SHOWN = 3
+
+# Projections: fetch only the fields the chatbot uses. Users skip the
+# password hash, orders skip shipping details and item images and return
+# only the first line items plus a count, products skip the image gallery.
+USER_PROJECTION = {"name": 1, "email": 1, "role": 1, "createdAt": 1}
+
+ORDER_PROJECTION = {
+    "status": 1,
+    "total": 1,
+    "createdAt": 1,
+    "isPaid": 1,
+    "isDelivered": 1,
+    "items_count": {"$size": {"$ifNull": ["$items", []]}},
+    "items": {"$map": {
+        "input": {"$slice": [{"$ifNull": ["$items", []]}, ORDER_ITEMS_SHOWN]},
+        "as": "item",
+        "in": {"name": "$$item.name", "quantity": "$$item.quantity", "price": "$$item.price"},
+    }},
+}
+
+PRODUCT_PROJECTION = {
+    "name": 1,
+    "description": 1,
+    "price": 1,
+    "category": 1,
+    "stock": 1,
+    "rating": 1,
+    "features": 1,
+}
+
+# Indexing also needs the main image and change timestamps
+PRODUCT_INDEX_PROJECTION = {**PRODUCT_PROJECTION, "image": 1, "updatedAt": 1, "createdAt": 1}
+
@@ -0,0 +1,44 @@
+"""
+One-off migration: set `shortId` on orders created before the Node Order
+model started storing it.
+
+New orders get `shortId` (the first 8 hex characters of their ObjectId) on
+save, and Order.js declares the (user, shortId) index. Orders without one
+are still found by the chatbot through an `_id` prefix range, just less
+cheaply. Run once from chatbot/backend with the usual .env:
+
+    python scripts/backfill_order_short_ids.py [--dry-run]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import MongoDB  # noqa: E402
+
+SHORT_ID_LENGTH = 8
+
+
+async def main(dry_run: bool):
+    await MongoDB.connect()
+    try:
+        orders = MongoDB.get_orders_collection()
+        missing = {"shortId": {"$exists": False}}
+        if dry_run:
+            print(f"{await orders.count_documents(missing)} orders without a shortId")
+            return
+        result = await orders.update_many(
+            missing,
+            [{"$set": {"shortId": {"$substrCP": [{"$toString": "$_id"}, 0, SHORT_ID_LENGTH]}}}],
+        )
+        print(f"Backfilled shortId on {result.modified_count} orders")
+    finally:
+        await MongoDB.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dry-run", action="store_true", help="only count the orders to update")
+    asyncio.run(main(parser.parse_args().dry_run))
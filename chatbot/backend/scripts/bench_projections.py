@@ -0,0 +1,217 @@
+"""
+Micro-benchmark: BSON bytes and decode time for the chatbot's MongoDB reads,
+full documents vs. the projections used by ContextService.
+
+Documents are synthetic, shaped like the Node backend's User, Order and
+Product models. The projections are applied in Python the way the server
+would apply them, so no database or API keys are needed:
+
+    python scripts/bench_projections.py [--docs 1000] [--repeat 5]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import bson
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.projections import (  # noqa: E402
+    ORDER_PROJECTION,
+    PRODUCT_INDEX_PROJECTION,
+    PRODUCT_PROJECTION,
+    USER_PROJECTION,
+)
+
+CATEGORIES = ["Electronics", "Fashion", "Home", "Sports", "Food", "Other"]
+IMAGE_URL = "https://res.cloudinary.com/shopease/image/upload/v1700000000/products/{}.jpg"
+
+
+_MISSING = object()
+
+
+def apply_projection(document: Dict[str, Any], projection: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a find() projection to a document in Python, the way MongoDB does.
+
+    Supports field inclusion and the expressions these projections use
+    (field paths, $ifNull, $size, $slice, $map).
+    """
+    result = {"_id": document["_id"]} if "_id" in document and projection.get("_id", 1) else {}
+    for field, spec in projection.items():
+        if field == "_id":
+            continue
+        if spec is True or spec == 1:
+            if field in document:
+                result[field] = document[field]
+            continue
+        value = _evaluate(spec, document, {})
+        if value is not _MISSING:
+            result[field] = value
+    return result
+
+
+def _evaluate(expression: Any, document: Dict[str, Any], variables: Dict[str, Any]) -> Any:
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, *path = expression[2:].split(".")
+        return _walk(variables.get(name, _MISSING), path)
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _walk(document, expression[1:].split("."))
+    if isinstance(expression, list):
+        return [_evaluate(e, document, variables) for e in expression]
+    if not isinstance(expression, dict):
+        return expression
+
+    if len(expression) == 1 and next(iter(expression)).startswith("$"):
+        operator, args = next(iter(expression.items()))
+        if operator == "$ifNull":
+            for arg in args:
+                value = _evaluate(arg, document, variables)
+                if value is not _MISSING and value is not None:
+                    return value
+            return None
+        if operator == "$size":
+            return len(_evaluate(args, document, variables))
+        if operator == "$slice":
+            values, count = _evaluate(args, document, variables)
+            return values[:count]
+        if operator == "$map":
+            values = _evaluate(args["input"], document, variables)
+            return [
+                _evaluate(args["in"], document, {**variables, args["as"]: value})
+                for value in values
+            ]
+        raise ValueError(f"Unsupported projection operator {operator}")
+
+    values = {key: _evaluate(value, document, variables) for key, value in expression.items()}
+    return {key: value for key, value in values.items() if value is not _MISSING}
+
+
+def _walk(value: Any, path: List[str]) -> Any:
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def make_user(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "name": f"Customer {rng.randint(1, 10**6)}",
+        "email": f"customer{rng.randint(1, 10**6)}@example.com",
+        "password": "$2a$10$" + "x" * 53,  # bcrypt hash
+        "role": "user",
+        "createdAt": datetime.now(timezone.utc) - timedelta(days=rng.randint(0, 900)),
+        "__v": 0,
+    }
+
+
+def make_order(rng: random.Random) -> Dict[str, Any]:
+    items = [
+        {
+            "_id": ObjectId(),
+            "product": ObjectId(),
+            "name": f"Product {rng.randint(1, 5000)}",
+            "image": IMAGE_URL.format(ObjectId()),
+            "price": round(rng.uniform(5, 500), 2),
+            "quantity": rng.randint(1, 4),
+        }
+        for _ in range(rng.randint(1, 12))
+    ]
+    return {
+        "_id": ObjectId(),
+        "user": ObjectId(),
+        "items": items,
+        "shippingAddress": {
+            "fullName": "Customer Name",
+            "email": "customer@example.com",
+            "phone": "+1 555 0100",
+            "address": "123 Market Street, Apartment 4B",
+            "city": "Springfield",
+            "state": "IL",
+            "zipCode": "62701",
+            "country": "United States",
+        },
+        "paymentMethod": "card",
+        "subtotal": 0,
+        "shipping": 9.99,
+        "tax": 4.5,
+        "total": round(sum(i["price"] * i["quantity"] for i in items), 2),
+        "status": rng.choice(["pending", "processing", "shipped", "delivered"]),
+        "isPaid": True,
+        "paidAt": datetime.now(timezone.utc),
+        "isDelivered": False,
+        "shortId": "",
+        "createdAt": datetime.now(timezone.utc),
+        "__v": 0,
+    }
+
+
+def make_product(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "name": f"Product {rng.randint(1, 5000)}",
+        "description": "A well made product for everyday use. " * rng.randint(2, 8),
+        "price": round(rng.uniform(5, 500), 2),
+        "originalPrice": round(rng.uniform(5, 600), 2),
+        "discount": rng.randint(0, 40),
+        "category": rng.choice(CATEGORIES),
+        "image": IMAGE_URL.format(ObjectId()),
+        "images": [IMAGE_URL.format(ObjectId()) for _ in range(rng.randint(2, 6))],
+        "stock": rng.randint(0, 200),
+        "rating": round(rng.uniform(0, 5), 1),
+        "numReviews": rng.randint(0, 900),
+        "features": [f"Feature {n}" for n in range(rng.randint(2, 6))],
+        "createdAt": datetime.now(timezone.utc),
+        "updatedAt": datetime.now(timezone.utc),
+        "__v": 0,
+    }
+
+
+def measure(docs: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    encoded = [bson.encode(doc) for doc in docs]
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for raw in encoded:
+            bson.decode(raw)
+        best = min(best, time.perf_counter() - started)
+    return {"bytes": sum(len(raw) for raw in encoded), "decode_ms": best * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1000, help="documents per collection")
+    parser.add_argument("--repeat", type=int, default=5, help="decode passes; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("users", make_user, USER_PROJECTION),
+        ("orders", make_order, ORDER_PROJECTION),
+        ("products (detail)", make_product, PRODUCT_PROJECTION),
+        ("products (index)", make_product, PRODUCT_INDEX_PROJECTION),
+    ]
+
+    print(f"{args.docs} documents per collection, best of {args.repeat} decode passes\n")
+    print(f"{'read':<20}{'full KB':>10}{'proj KB':>10}{'saved':>8}{'full ms':>10}{'proj ms':>10}")
+    for name, make, projection in cases:
+        docs = [make(rng) for _ in range(args.docs)]
+        full = measure(docs, args.repeat)
+        lean = measure([apply_projection(doc, projection) for doc in docs], args.repeat)
+        saved = 1 - lean["bytes"] / full["bytes"]
+        print(
+            f"{name:<20}{full['bytes'] / 1024:>10.1f}{lean['bytes'] / 1024:>10.1f}{saved:>8.0%}"
+            f"{full['decode_ms']:>10.2f}{lean['decode_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
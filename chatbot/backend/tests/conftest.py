@@ -0,0 +1,6 @@
+import os
+
+# Settings requires these; tests never reach the real services
+for name in ("OPENAI_API_KEY", "COHERE_API_KEY", "QDRANT_API_KEY", "MONGODB_URI", "QDRANT_URL"):
+    os.environ.setdefault(name, "http://localhost:6333" if name == "QDRANT_URL" else "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
@@ -0,0 +1,67 @@
+import pytest
+from app.services.intent_router import IntentRouter
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(min_confidence=0.8)
+
+
+@pytest.mark.parametrize("message, intent, order_ref", [
+    ("where is my order", "order_list", None),
+    ("Where's my order?", "order_list", None),
+    ("show me my recent orders please", "order_list", None),
+    ("order history", "order_list", None),
+    ("is order ab12cd34 delivered", "order_lookup", "ab12cd34"),
+    ("Is #AB12CD34 shipped yet?", "order_lookup", "ab12cd34"),
+    ("track order 6ad50892c324f58eb8e40202", "order_lookup", "6ad50892c324f58eb8e40202"),
+    ("list categories", "categories", None),
+    ("what categories do you have?", "categories", None),
+])
+def test_simple_requests_take_the_fast_path(router, message, intent, order_ref):
+    result = router.classify(message)
+    assert result is not None
+    assert result.name == intent
+    assert result.order_ref == order_ref
+
+
+@pytest.mark.parametrize("message", [
+    # Complaints and negations
+    "my order has not arrived",
+    "my order hasn't arrived",
+    "I never got my order",
+    "order ab12cd34 still not delivered",
+    "my order arrived broken",
+    "wrong item in my order",
+    # Qualified queries
+    "show me my orders for headphones",
+    "orders with a laptop",
+    "my orders from last month",
+    "what categories of shoes under $50",
+    "show my delivered orders",
+    "is my order shipped",
+    "has my package arrived yet",
+    "list my pending orders",
+    "do you have a shoes category",
+    "show the electronics category",
+    # Actions
+    "hi can you cancel my order",
+    "I want to return my order",
+    # Other intents, ambiguity and chit-chat
+    "I need a gift for my mom",
+    "what about that order?",
+    "do my orders include any categories",
+    "hi",
+])
+def test_other_requests_go_to_the_agent(router, message):
+    assert router.classify(message) is None
+
+
+def test_stats_track_fast_path_rate(router):
+    router.record(router.classify("where is my order"))
+    router.record(None)
+    stats = router.stats()
+    assert stats["hits"] == 1
+    assert stats["fallbacks"] == 1
+    assert stats["rate"] == 0.5
+    assert stats["by_intent"] == {"order_list": 1}
@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.database import Base
+from app.models.chat import ChatThread  # noqa: F401 - registers the tables
+from app.routers.chat import get_thread, get_threads
+
+# What server_default=func.now() stored in SQLite before the Python default
+LEGACY_TIMESTAMP = "2024-05-01 10:00:00"
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for thread_id in "abcd":
+            await conn.execute(
+                text("INSERT INTO chat_threads (id, user_id, created_at) VALUES (:id, 'u1', :ts)"),
+                {"id": thread_id, "ts": LEGACY_TIMESTAMP},
+            )
+        for n in range(1, 6):
+            await conn.execute(
+                text("INSERT INTO chat_messages (id, thread_id, role, content, created_at) "
+                     "VALUES (:id, 'a', 'user', 'hi', :ts)"),
+                {"id": f"m{n}", "ts": LEGACY_TIMESTAMP},
+            )
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_threads_page_through_legacy_timestamps(db):
+    pages, cursor = [], None
+    while True:
+        page = await get_threads(user_id="u1", limit=2, cursor=cursor, db=db)
+        pages.append([thread.id for thread in page.threads])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert pages == [["d", "c"], ["b", "a"]]
+
+
+@pytest.mark.asyncio
+async def test_messages_page_back_through_legacy_timestamps(db):
+    thread = await get_thread(thread_id="a", user_id="u1", limit=2, before=None, after=None, db=db)
+    pages = [[m.id for m in thread.messages]]
+    while thread.before_cursor:
+        thread = await get_thread(
+            thread_id="a", user_id="u1", limit=2, before=thread.before_cursor, after=None, db=db
+        )
+        pages.append([m.id for m in thread.messages])
+    assert pages == [["m4", "m5"], ["m2", "m3"], ["m1"]]
+
+
+@pytest.mark.asyncio
+async def test_messages_page_forward_through_legacy_timestamps(db):
+    first = await get_thread(thread_id="a", user_id="u1", limit=2, before=None, after=None, db=db)
+    older = await get_thread(thread_id="a", user_id="u1", limit=2, before=first.before_cursor, after=None, db=db)
+    newer = await get_thread(thread_id="a", user_id="u1", limit=2, before=None, after=older.after_cursor, db=db)
+    assert [m.id for m in newer.messages] == ["m4", "m5"]
@@ -4,6 +4,7 @@ import { sendMessage as sendChatMessage, getThread, getThreads } from '../servic
 export const useChat = (userId) => {
   const [messages, setMessages] = useState([]);
   const [threadId, setThreadId] = useState(null);
+  const [earlierCursor, setEarlierCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -60,6 +61,7 @@ export const useChat = (userId) => {
       const thread = await getThread(id, userId);
       setThreadId(thread.id);
       setMessages(thread.messages || []);
+      setEarlierCursor(thread.before_cursor || null);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to load thread');
     } finally {
@@ -67,9 +69,28 @@ export const useChat = (userId) => {
     }
   }, [userId]);
 
+  // Prepend the page of messages before the oldest one shown
+  const loadEarlierMessages = useCallback(async () => {
+    if (!userId || !threadId || !earlierCursor) return;
+
+    setIsLoading(true);
+    setError(null);
+
+    try {
+      const thread = await getThread(threadId, userId, { before: earlierCursor });
+      setMessages((prev) => [...(thread.messages || []), ...prev]);
+      setEarlierCursor(thread.before_cursor || null);
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to load earlier messages');
+    } finally {
+      setIsLoading(false);
+    }
+  }, [userId, threadId, earlierCursor]);
+
   const startNewThread = useCallback(() => {
     setThreadId(null);
     setMessages([]);
+    setEarlierCursor(null);
     setError(null);
   }, []);
 
@@ -77,7 +98,15 @@ export const useChat = (userId) => {
     if (!userId) return [];
 
     try {
-      return await getThreads(userId);
+      // Follow next_cursor so callers get every thread, newest first
+      const threads = [];
+      let cursor = null;
+      do {
+        const page = await getThreads(userId, cursor);
+        threads.push(...page.threads);
+        cursor = page.next_cursor;
+      } while (cursor);
+      return threads;
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to load threads');
       return [];
@@ -91,6 +120,8 @@ export const useChat = (userId) => {
     error,
     sendMessage,
     loadThread,
+    loadEarlierMessages,
+    hasEarlierMessages: Boolean(earlierCursor),
     startNewThread,
     loadThreads,
   };